@@ -0,0 +1,145 @@
+# core/agent_pool.py
+import itertools
+import time
+from queue import Queue, Full, Empty
+from threading import Thread, Lock, Event
+
+OVERFLOW_POLICIES = ("reject", "block", "drop_oldest")
+
+# Placed on the queue once per worker to tell it to exit, when there is room
+_STOP = object()
+# Idle workers check this often whether the pool is shutting down
+STOP_POLL_INTERVAL = 0.5
+
+
+class AgentWorkerPool:
+    """
+    Runs tasks for a single agent on a fixed number of worker threads.
+
+    Pending tasks wait in a bounded queue. When the queue is full the
+    overflow policy decides what happens to a new task:
+      - "reject":      the new task is refused immediately
+      - "block":       wait up to `block_timeout` seconds for room, then refuse
+      - "drop_oldest": the oldest pending task is discarded to make room
+    Queue depth, wait time and run time of every task are reported on the update queue.
+    """
+    def __init__(self, agent, update_queue, max_workers=2, max_pending=10,
+                 overflow_policy="reject", block_timeout=5.0):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow_policy}'. Expected one of {OVERFLOW_POLICIES}.")
+        self.agent = agent
+        self.update_queue = update_queue
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._queue = Queue(maxsize=self.max_pending)
+        self._workers = []
+        self._stopping = Event()
+        self._task_ids = itertools.count(1)
+        self._lock = Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        """Starts the worker threads. Calling it twice has no effect."""
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = Thread(target=self._worker_loop, name=f"{self.agent.name}-worker-{i + 1}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, task):
+        """Queues a task for the agent. Returns True if it was accepted, False if it was rejected."""
+        task_id = next(self._task_ids)
+        item = (task_id, task, time.monotonic())
+        try:
+            if self.overflow_policy == "block":
+                self._queue.put(item, timeout=self.block_timeout)
+            elif self.overflow_policy == "drop_oldest":
+                self._put_dropping_oldest(item)
+            else:
+                self._queue.put_nowait(item)
+        except Full:
+            with self._lock:
+                self.rejected += 1
+            self.update_queue.put(
+                f"[{self.agent.name}] Task #{task_id} rejected: queue is full "
+                f"({self.max_pending} pending, policy '{self.overflow_policy}')."
+            )
+            return False
+
+        self.update_queue.put(
+            f"[{self.agent.name}] Task #{task_id} queued (queue depth {self.queue_depth}/{self.max_pending})."
+        )
+        return True
+
+    def _put_dropping_oldest(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except Full:
+                try:
+                    dropped_id, dropped_task, _ = self._queue.get_nowait()
+                except Empty:
+                    continue
+                self._queue.task_done()
+                with self._lock:
+                    self.rejected += 1
+                self.update_queue.put(
+                    f"[{self.agent.name}] Task #{dropped_id} dropped to make room for newer work: {dropped_task}"
+                )
+
+    def shutdown(self, wait=True):
+        """
+        Stops the workers once the tasks already queued have been run. Never
+        blocks on a full queue: workers that get no stop marker exit when they
+        find the queue empty. Only wait=True waits for the workers.
+        """
+        with self._lock:
+            workers = list(self._workers)
+            self._workers = []
+        self._stopping.set()
+        for _ in workers:
+            try:
+                self._queue.put_nowait(_STOP) # Wakes an idle worker right away
+            except Full:
+                break
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _worker_loop(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=STOP_POLL_INTERVAL)
+            except Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            try:
+                if item is _STOP:
+                    return
+                task_id, task, enqueued_at = item
+                started_at = time.monotonic()
+                self.update_queue.put(
+                    f"[{self.agent.name}] Task #{task_id} started after waiting {started_at - enqueued_at:.2f}s "
+                    f"(queue depth {self.queue_depth}/{self.max_pending})."
+                )
+                try:
+                    self.agent.run_task(task)
+                except Exception as e:
+                    self.update_queue.put(f"[{self.agent.name}] Task #{task_id} crashed: {e}")
+                run_time = time.monotonic() - started_at
+                with self._lock:
+                    self.completed += 1
+                self.update_queue.put(f"[{self.agent.name}] Task #{task_id} finished in {run_time:.2f}s.")
+            finally:
+                self._queue.task_done()
@@ -8,7 +8,80 @@ def load_settings():
     default_settings = {
         "ALLOW_RUN_SCRIPTS": True,
         "ALLOW_SUDO": False,
-        "tesseract_cmd_path": None
+        # read_file returns at most this many bytes per call; larger files are read in pages
+        "READ_FILE_MAX_BYTES": 65536,
+        # search_workspace: names skipped while indexing (fnmatch patterns; None = built-in list) and size limit
+        "SEARCH_IGNORE_PATTERNS": None,
+        "SEARCH_MAX_FILE_BYTES": 1048576,
+        # Seconds a search_workspace index is reused before the tree is re-scanned for changes
+        "SEARCH_UPDATE_INTERVAL": 5.0,
+        # MemOS: queued saves are written in one bulk add every FLUSH_INTERVAL seconds or once BATCH_SIZE
+        # messages are waiting; recall results are cached per normalized query until the next save
+        "MEMOS_FLUSH_INTERVAL": 2.0,
+        "MEMOS_BATCH_SIZE": 32,
+        "MEMOS_RECALL_CACHE_SIZE": 256,
+        # Load the shared MemOS models in the background when the supervisor starts
+        "MEMOS_WARM_UP": False,
+        # Memory store behind MemOSClient: "memos" (MemoryOS) or "local" (vector index on disk under MEMORY_DIR)
+        "MEMORY_BACKEND": "memos",
+        "MEMORY_DIR": "jaraxxus_memory",
+        "MEMORY_EMBEDDING_MODEL": "sentence-transformers/all-MiniLM-L6-v2",
+        # Local index: memories returned per recall, IVF lists (None = square root of the memory count)
+        # and how many of the closest lists each recall scans
+        "MEMORY_TOP_K": 5,
+        "MEMORY_IVF_LISTS": None,
+        "MEMORY_IVF_PROBE": 16,
+        # Agent prompts are kept under CONTEXT_BUDGET_TOKENS (estimated at 4 chars per token; 0 = no limit):
+        # the newest KEEP_RECENT entries or more stay verbatim, older ones are folded into a summary, and
+        # single entries such as tool results are shortened to MAX_ITEM_TOKENS
+        "CONTEXT_BUDGET_TOKENS": 8000,
+        "CONTEXT_KEEP_RECENT": 4,
+        "CONTEXT_MAX_ITEM_TOKENS": 1000,
+        # Also save folded entries to MemOS (see MEMORY_BACKEND) so they can still be recalled
+        "CONTEXT_ARCHIVE_TO_MEMORY": False,
+        # run_command: wall-clock limit (seconds) and characters of output kept per stream
+        "COMMAND_TIMEOUT": 300,
+        "COMMAND_MAX_OUTPUT_CHARS": 20000,
+        "tesseract_cmd_path": None,
+        # Per-agent worker pool defaults (can be overridden per agent in jaraxxus_config.json)
+        "AGENT_MAX_WORKERS": 2,
+        "AGENT_MAX_PENDING": 10,
+        "AGENT_OVERFLOW_POLICY": "reject",
+        # "threads" runs tasks on per-agent worker pools, "async" multiplexes them on one event loop
+        "AGENT_RUNTIME": "threads",
+        "ASYNC_MAX_IN_FLIGHT": 256,
+        # Process-wide cap on concurrent outbound LLM requests
+        "LLM_MAX_CONCURRENCY": 8,
+        # Stream LLM tokens to the GUI as they arrive
+        "STREAM_LLM_OUTPUT": True,
+        # Import tool modules on first use instead of at startup
+        "LAZY_TOOL_LOADING": True,
+        # Parallel OCR processes for PDF extraction (None = one per CPU core)
+        "OCR_WORKERS": None,
+        # Parallel processes for pdf_split (None = one per CPU core)
+        "PDF_SPLIT_WORKERS": None,
+        # Pages with fewer non-whitespace characters of extractable text are OCRed
+        "OCR_MIN_TEXT_CHARS": 20,
+        # Shared on-disk cache (extraction results, HTTP responses, indexes)
+        "CACHE_DIR": ".jaraxxus_cache",
+        "EXTRACTION_CACHE": True,
+        "EXTRACTION_CACHE_MAX_MB": 512,
+        # Shared HTTP session: keep-alive connections per host, extra requests wait for a free one
+        "HTTP_POOL_HOSTS": 16,
+        "HTTP_MAX_CONN_PER_HOST": 4,
+        # Minimum seconds between network requests to the same host
+        "HTTP_HOST_MIN_INTERVAL": 0.1,
+        # Concurrent fetches and overall deadline (seconds) for web_scrape's "urls" mode
+        "WEB_SCRAPE_WORKERS": 8,
+        "WEB_SCRAPE_TIMEOUT": 60,
+        # web_scrape downloads at most MAX_BYTES of a page and returns at most MAX_CHARS of text
+        "WEB_SCRAPE_MAX_BYTES": 2097152,
+        "WEB_SCRAPE_MAX_CHARS": 20000,
+        # HTTP response cache; DEFAULT_TTL applies when the server sends no freshness headers,
+        # entries not refreshed within MAX_AGE seconds are deleted
+        "HTTP_CACHE": True,
+        "HTTP_CACHE_DEFAULT_TTL": 300,
+        "HTTP_CACHE_MAX_AGE": 86400
     }
     # You can add logic here to load from a file, environment variables, etc.
     return default_settings
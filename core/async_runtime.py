@@ -0,0 +1,96 @@
+# core/async_runtime.py
+import asyncio
+import itertools
+import time
+from threading import Thread, Lock
+
+
+class AsyncAgentRuntime:
+    """
+    Runs agent tasks as coroutines on a single asyncio event loop that lives
+    in a background thread. Hundreds of tasks can be in flight at once without
+    an OS thread each; outbound LLM calls are throttled by the process-wide
+    limiter in core.llm_clients.limiter.
+
+    Like AgentWorkerPool, it reports wait time and run time of every task on the
+    update queue, and refuses new tasks once `max_in_flight` is reached.
+    """
+    def __init__(self, update_queue, max_in_flight=256):
+        self.update_queue = update_queue
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.loop = None
+        self._thread = None
+        self._task_ids = itertools.count(1)
+        self._lock = Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self):
+        """Starts the event loop thread. Calling it twice has no effect."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = Thread(target=self._run_loop, args=(self.loop,), name="agent-event-loop", daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _run_loop(loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+        loop.close()
+
+    def submit(self, agent, task):
+        """Schedules agent.run_task_async(task) on the loop. Returns False if the task was rejected."""
+        task_id = next(self._task_ids)
+        with self._lock:
+            if self.loop is None or self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                accepted = False
+            else:
+                self.in_flight += 1
+                accepted = True
+
+        if not accepted:
+            self.update_queue.put(
+                f"[{agent.name}] Task #{task_id} rejected: runtime is at capacity ({self.max_in_flight} tasks in flight)."
+            )
+            return False
+
+        asyncio.run_coroutine_threadsafe(self._run(agent, task_id, task, time.monotonic()), self.loop)
+        self.update_queue.put(f"[{agent.name}] Task #{task_id} queued ({self.in_flight}/{self.max_in_flight} in flight).")
+        return True
+
+    async def _run(self, agent, task_id, task, enqueued_at):
+        started_at = time.monotonic()
+        self.update_queue.put(f"[{agent.name}] Task #{task_id} started after waiting {started_at - enqueued_at:.2f}s.")
+        try:
+            await agent.run_task_async(task)
+        except Exception as e:
+            self.update_queue.put(f"[{agent.name}] Task #{task_id} crashed: {e}")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+        self.update_queue.put(f"[{agent.name}] Task #{task_id} finished in {time.monotonic() - started_at:.2f}s.")
+
+    def stop(self, wait=True):
+        """Cancels any running tasks and stops the event loop."""
+        with self._lock:
+            loop, thread = self.loop, self._thread
+            self.loop, self._thread = None, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._cancel_all(), loop)
+        if wait:
+            thread.join()
+
+    @staticmethod
+    async def _cancel_all():
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        asyncio.get_running_loop().stop()
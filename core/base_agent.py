@@ -1,7 +1,17 @@
 # core/base_agent.py
 import os
 import json
+import asyncio
+from contextlib import aclosing
+from threading import Lock
 import google.generativeai as genai
+from core.prompt_builder import ToolCatalog, PromptBuilder
+from core.context_manager import create_context_manager
+from core.llm_clients.limiter import llm_limiter
+from core.llm_clients.async_adapters import AsyncGeminiClient
+from core.streaming import ReplyStream
+from core.app_config import settings
+from tools._common import progress_hook
 
 # Configure API key
 try:
@@ -16,78 +26,163 @@ class BaseAgent:
         self.description = description
         self.tools = tools
         self.update_queue = update_queue
-        self.status = "idle"
+        # Several tasks may run on the same agent at once, so status is derived from a counter
+        self._active_tasks = 0
+        self._status_lock = Lock()
+        self.last_prompt_stats = []
         self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.async_model = AsyncGeminiClient(self.model)
+        # The rendered tool catalog is shared by all tasks and only re-rendered when the tools change
+        self.tool_catalog = ToolCatalog(self.tools)
         print(f"Agent '{self.name}' created with tools: {list(self.tools.keys())}")
 
-    def _build_prompt(self, task, history):
-        """Builds the prompt for the LLM, including the task, history, and tools."""
-        tool_details = []
-        for tool_name, tool_module in self.tools.items():
-            description = getattr(tool_module, 'DESCRIPTION', 'No description.')
-            args_schema = getattr(tool_module, 'ARGS_SCHEMA', '{}')
-            tool_details.append(f"- Tool: `{tool_name}`\n  Description: {description}\n  Arguments (JSON): {args_schema}")
-        tools_string = "\n".join(tool_details)
-
-        prompt = f"""
-        You are an autonomous AI agent named {self.name}. Your goal is to accomplish the user's task by breaking it down into steps and using the available tools.
-
-        Available Tools:
-        {tools_string}
-
-        Conversation History (User's Task and results from previous tool executions):
-        {history}
-
-        Based on the history, decide on the next step. You have two choices:
-        1.  Use a tool: Respond with a single JSON object:
-            {{"thought": "<reasoning>", "tool_to_use": "<tool_name>", "tool_input": {{<json_args>}}}}
-        2.  Finish the task: If you have the final answer for the user, respond with:
-            {{"thought": "<summary of what was accomplished>", "final_answer": "<your complete and final answer to the user>"}}
-        """
-        return prompt
+    @property
+    def status(self):
+        return "running" if self._active_tasks else "idle"
 
-    def run_task(self, task):
-        self.status = "running"
+    def _begin_task(self, task):
+        # Long tasks are kept under the context budget; older tool results are folded into a summary
+        prompt_builder = PromptBuilder(self.name, self.tool_catalog, task, context=create_context_manager(self.name))
+        with self._status_lock:
+            self._active_tasks += 1
         self.update_queue.put(f"[{self.name}] Starting new task: {task}")
+        return prompt_builder
+
+    def _end_task(self, prompt_builder):
+        self.last_prompt_stats = prompt_builder.stats
+        print(f"[{self.name}] Prompt growth: {prompt_builder.summary()}")
+        with self._status_lock:
+            self._active_tasks -= 1
+
+    def _plan_step(self, llm_response_text):
+        """
+        Interprets one LLM reply. Returns (tool_name, tool_input) when a tool
+        should be run next, or None when the task is finished or cannot continue.
+        """
+        if llm_response_text.strip().startswith("```json"):
+            cleaned_json_str = llm_response_text.strip()[7:-3].strip()
+        else:
+            cleaned_json_str = llm_response_text.strip()
+
+        parsed_response = json.loads(cleaned_json_str)
+
+        if "final_answer" in parsed_response:
+            final_answer = parsed_response["final_answer"]
+            self.update_queue.put(f"[{self.name}] Task Complete. Final Answer:\n{final_answer}")
+            return None
+
+        tool_name = parsed_response.get("tool_to_use")
+        tool_input = parsed_response.get("tool_input", {})
 
-        conversation_history = f"USER_TASK: {task}"
+        if tool_name and tool_name in self.tools:
+            self.update_queue.put(f"[{self.name}] Executing tool: '{tool_name}'")
+            return tool_name, tool_input
 
-        while True: # The main reasoning loop
-            prompt = self._build_prompt(task, conversation_history)
+        self.update_queue.put(f"[{self.name}] LLM chose an invalid tool. Ending task.")
+        return None
 
-            try:
+    def _generate_reply(self, prompt):
+        """
+        Calls the model and returns the reply text to act on. When streaming is
+        enabled, tokens are forwarded to the update queue as they arrive and
+        reading stops as soon as a complete JSON action has been received.
+        """
+        if not settings.get("STREAM_LLM_OUTPUT", True):
+            with llm_limiter:
                 llm_response_text = self.model.generate_content(prompt).text
-                self.update_queue.put(f"[{self.name}] Reasoning:\n{llm_response_text}")
+            self.update_queue.put(f"[{self.name}] Reasoning:\n{llm_response_text}")
+            return llm_response_text
+
+        stream = ReplyStream(self.update_queue, f"[{self.name}] Reasoning:\n")
+        try:
+            with llm_limiter:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if stream.feed(chunk.text):
+                        break
+        finally:
+            llm_response_text = stream.close()
+        return llm_response_text
+
+    async def _generate_reply_async(self, prompt):
+        """Async version of _generate_reply."""
+        if not settings.get("STREAM_LLM_OUTPUT", True):
+            llm_response_text = await self.async_model.generate(prompt)
+            self.update_queue.put(f"[{self.name}] Reasoning:\n{llm_response_text}")
+            return llm_response_text
+
+        stream = ReplyStream(self.update_queue, f"[{self.name}] Reasoning:\n")
+        try:
+            async with aclosing(self.async_model.stream(prompt)) as chunks:
+                async for chunk in chunks:
+                    if stream.feed(chunk):
+                        break
+        finally:
+            llm_response_text = stream.close()
+        return llm_response_text
+
+    def _run_tool(self, tool_name, tool_input):
+        """Runs a tool, forwarding any progress it reports to the update queue."""
+        token = progress_hook.set(lambda message: self.update_queue.put(f"[{self.name}] {tool_name}: {message}"))
+        try:
+            return self.tools[tool_name].run(tool_input)
+        finally:
+            progress_hook.reset(token)
+
+    def _record_tool_result(self, prompt_builder, tool_name, result):
+        # Add the result to the conversation history for the next loop iteration
+        prompt_builder.add_segment(f"TOOL_RESULT for {tool_name}: {result}")
+        self.update_queue.put(f"[{self.name}] Tool Result:\n{result}")
+
+    def run_task(self, task):
+        prompt_builder = self._begin_task(task)
+
+        try:
+            while True: # The main reasoning loop
+                prompt = prompt_builder.build()
 
-                if llm_response_text.strip().startswith("```json"):
-                    cleaned_json_str = llm_response_text.strip()[7:-3].strip()
-                else:
-                    cleaned_json_str = llm_response_text.strip()
+                try:
+                    llm_response_text = self._generate_reply(prompt)
 
-                parsed_response = json.loads(cleaned_json_str)
+                    step = self._plan_step(llm_response_text)
+                    if step is None:
+                        break # Exit the loop
 
-                if "final_answer" in parsed_response:
-                    final_answer = parsed_response["final_answer"]
-                    self.update_queue.put(f"[{self.name}] Task Complete. Final Answer:\n{final_answer}")
-                    break # Exit the loop
+                    tool_name, tool_input = step
+                    result = self._run_tool(tool_name, tool_input)
+                    self._record_tool_result(prompt_builder, tool_name, result)
+
+                except Exception as e:
+                    self.update_queue.put(f"[{self.name}] An error occurred: {e}")
+                    break # Exit on any error
+        finally:
+            self._end_task(prompt_builder)
+
+    async def run_task_async(self, task):
+        """
+        Same reasoning loop as run_task, but cooperative: the model call is
+        awaited and tools run in worker threads, so many tasks can share one
+        event loop.
+        """
+        prompt_builder = self._begin_task(task)
 
-                tool_name = parsed_response.get("tool_to_use")
-                tool_input = parsed_response.get("tool_input", {})
+        try:
+            while True:
+                prompt = prompt_builder.build()
 
-                if tool_name and tool_name in self.tools:
-                    self.update_queue.put(f"[{self.name}] Executing tool: '{tool_name}'")
-                    tool_module = self.tools[tool_name]
-                    result = tool_module.run(tool_input)
+                try:
+                    llm_response_text = await self._generate_reply_async(prompt)
 
-                    # Add the result to the conversation history for the next loop iteration
-                    conversation_history += f"\nTOOL_RESULT for {tool_name}: {result}"
-                    self.update_queue.put(f"[{self.name}] Tool Result:\n{result}")
-                else:
-                    self.update_queue.put(f"[{self.name}] LLM chose an invalid tool. Ending task.")
-                    break # Exit the loop
+                    step = self._plan_step(llm_response_text)
+                    if step is None:
+                        break
 
-            except Exception as e:
-                self.update_queue.put(f"[{self.name}] An error occurred: {e}")
-                break # Exit on any error
+                    tool_name, tool_input = step
+                    result = await asyncio.to_thread(self._run_tool, tool_name, tool_input)
+                    self._record_tool_result(prompt_builder, tool_name, result)
 
-        self.status = "idle"
+                except Exception as e:
+                    self.update_queue.put(f"[{self.name}] An error occurred: {e}")
+                    break
+        finally:
+            # Also runs when the task is cancelled by the runtime
+            self._end_task(prompt_builder)
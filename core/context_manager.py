@@ -0,0 +1,190 @@
+# core/context_manager.py
+import time
+from threading import Lock
+from typing import List, Dict, Optional
+
+from core.app_config import settings
+
+# No tokenizer is bundled, so prompt sizes are estimated from characters
+CHARS_PER_TOKEN = 4
+# Share of the budget the summary of folded entries may use; the rest is for recent entries
+SUMMARY_SHARE = 0.25
+# When the recent entries overflow, fold until they use this share of their budget,
+# so compaction happens in occasional bursts instead of on every step
+FOLD_TARGET = 0.5
+# Characters of each folded entry kept in its summary line
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip_text(text: str, max_tokens: int) -> str:
+    """Shortens text to about max_tokens by cutting out its middle; the start and end usually matter most."""
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    half = max(1, max_chars // 2)
+    return f"{text[:half]}\n[... {len(text) - 2 * half:,} chars omitted ...]\n{text[-half:]}"
+
+
+def _summary_line(message):
+    lines = message["content"].strip().splitlines()
+    digest = " ".join(lines[0].split()) if lines else ""
+    if len(digest) > SUMMARY_LINE_CHARS or len(lines) > 1:
+        digest = digest[:SUMMARY_LINE_CHARS].rstrip() + " ..."
+    role = message.get("role")
+    return f"- {role}: {digest}" if role else f"- {digest}"
+
+
+class ContextManager:
+    """
+    Keeps a growing conversation under a token budget.
+
+    The first `pinned` entries (the system prompt or the user's task) are
+    always kept whole. After them, the newest entries are kept verbatim, at least
+    `keep_recent` of them. When they no longer fit, the oldest are folded
+    into a summary of one line per entry. The summary has its own cap, and
+    when it is full its oldest lines are dropped. A `summarize` callable can
+    replace the line-per-entry digest, e.g. with an LLM summary of each
+    folded block. With `memory` set (a MemOSClient), every folded entry is
+    also saved there in full so it can still be recalled.
+
+    Each entry is folded only once. The manager remembers how far it has
+    folded, so each call only looks at entries that are still verbatim, and
+    the cost of a call stays flat as the conversation grows. This relies on
+    the conversation only growing at the end. If an already-folded entry
+    changes, the fold state is rebuilt.
+    """
+    def __init__(self, budget_tokens: int = None, keep_recent: int = None, max_item_tokens: int = None,
+                 summarize=None, memory=None):
+        self.budget_tokens = budget_tokens if budget_tokens is not None else settings.get("CONTEXT_BUDGET_TOKENS", 8000)
+        self.keep_recent = keep_recent if keep_recent is not None else settings.get("CONTEXT_KEEP_RECENT", 4)
+        self.max_item_tokens = max_item_tokens or settings.get("CONTEXT_MAX_ITEM_TOKENS", 1000)
+        self.summarize = summarize
+        self.memory = memory
+        self.folded = 0 # Entries after the pinned ones that have been folded into the summary
+        self._fold_marker = None # Last folded entry, to notice when the conversation was rewritten
+        self._summary_lines = []
+        self._archived = set() # Hashes of entries already saved to memory, so a rebuilt fold doesn't save them twice
+        self._lock = Lock()
+
+    def clip(self, text: str) -> str:
+        """Shortens a single entry (e.g. a tool result) to max_item_tokens."""
+        return clip_text(text, self.max_item_tokens)
+
+    def _sync(self, body):
+        if self.folded and (len(body) < self.folded or body[self.folded - 1] != self._fold_marker):
+            self.folded = 0
+            self._fold_marker = None
+            self._summary_lines = []
+
+    def _fold(self, messages):
+        if self.summarize is not None:
+            self._summary_lines.append(f"- {self.summarize(messages)}")
+        else:
+            self._summary_lines.extend(_summary_line(m) for m in messages)
+        if self.memory is not None:
+            new = [m for m in messages if hash((m.get("role"), m["content"])) not in self._archived]
+            try:
+                if new:
+                    self.memory.save_memory([{"role": m.get("role") or "user", "content": m["content"]} for m in new])
+                    self._archived.update(hash((m.get("role"), m["content"])) for m in new)
+            except Exception as e:
+                print(f"Context compaction: could not archive folded entries to memory: {e}")
+        self.folded += len(messages)
+        self._fold_marker = messages[-1]
+
+    def _render_summary(self, max_tokens):
+        header = f"[Context compacted: {self.folded} earlier entries condensed"
+        header += ", full text saved to memory]" if self.memory is not None else "]"
+        used = estimate_tokens(header)
+        lines = []
+        for line in reversed(self._summary_lines): # The newest folded entries are the most relevant
+            used += estimate_tokens(line) + 1
+            if used > max_tokens and lines:
+                lines.append(f"- ... {len(self._summary_lines) - len(lines)} older entries omitted")
+                break
+            lines.append(line)
+        return "\n".join([header] + lines[::-1])
+
+    def fit(self, messages: List[Dict[str, str]], pinned: int = 1, reserved_tokens: int = 0) -> List[Dict[str, str]]:
+        """
+        Returns the messages to send: the pinned ones, a summary of folded
+        entries (as a system message) if there are any, then the recent
+        entries. `reserved_tokens` is taken off the budget for prompt text
+        outside the messages.
+        """
+        if not self.budget_tokens:
+            return list(messages)
+        with self._lock:
+            head = list(messages[:pinned]) # Pinned entries are never clipped, only charged against the budget
+            body = messages[pinned:]
+            self._sync(body)
+            available = self.budget_tokens - reserved_tokens - sum(estimate_tokens(m["content"]) for m in head)
+            summary_budget = int(available * SUMMARY_SHARE)
+
+            recent = [dict(m, content=self.clip(m["content"])) for m in body[self.folded:]]
+            costs = [estimate_tokens(m["content"]) + 1 for m in recent]
+            recent_budget = available if not self.folded and sum(costs) <= available else available - summary_budget
+            if sum(costs) > recent_budget:
+                target = recent_budget * FOLD_TARGET
+                keep, used = 0, 0
+                for cost in reversed(costs):
+                    if keep >= self.keep_recent and used + cost > target:
+                        break
+                    keep += 1
+                    used += cost
+                fold_count = len(recent) - keep
+                if fold_count:
+                    self._fold(body[self.folded:self.folded + fold_count])
+                    recent, costs = recent[fold_count:], costs[fold_count:]
+                if sum(costs) > recent_budget:
+                    # Even the newest keep_recent entries are too big: share what is left evenly
+                    share = max(1, recent_budget // max(1, len(recent)))
+                    recent = [dict(m, content=clip_text(m["content"], share)) for m in recent]
+
+            if not self.folded:
+                return head + recent
+            summary = {"role": "system", "content": self._render_summary(summary_budget)}
+            return head + [summary] + recent
+
+    def fit_segments(self, segments: List[str], pinned: int = 1, reserved_tokens: int = 0) -> List[str]:
+        """fit() for plain text entries, such as PromptBuilder's history segments."""
+        messages = [{"content": s} for s in segments]
+        return [m["content"] for m in self.fit(messages, pinned=pinned, reserved_tokens=reserved_tokens)]
+
+
+def create_context_manager(memory_user_id: Optional[str] = None) -> ContextManager:
+    """A ContextManager configured from settings; folded entries go to MemOS when CONTEXT_ARCHIVE_TO_MEMORY is set."""
+    memory = None
+    if memory_user_id and settings.get("CONTEXT_ARCHIVE_TO_MEMORY", False):
+        from core.llm_clients.memos_client import get_memos_client
+        memory = get_memos_client(memory_user_id)
+    return ContextManager(memory=memory)
+
+
+def benchmark_session(steps=300, budget_tokens=8000):
+    """Prompt size and compaction time per step over a long simulated session, with and without a budget."""
+    import random
+    rng = random.Random(0)
+    observations = [f"Observation {i}: " + " ".join(f"word{rng.randrange(5000)}" for _ in range(rng.randrange(40, 1500)))
+                    for i in range(steps)]
+    for label, manager in (("no budget", ContextManager(budget_tokens=0)),
+                           (f"budget {budget_tokens}", ContextManager(budget_tokens=budget_tokens))):
+        messages = [{"role": "system", "content": "You are Jaraxxus. " * 200}]
+        sizes = []
+        start = time.perf_counter()
+        for step, observation in enumerate(observations):
+            messages.append({"role": "assistant", "content": f'{{"action": "read_file", "step": {step}}}'})
+            messages.append({"role": "system", "content": manager.clip(observation) if manager.budget_tokens else observation})
+            sizes.append(sum(estimate_tokens(m["content"]) for m in manager.fit(messages)))
+        elapsed = time.perf_counter() - start
+        checkpoints = ", ".join(f"step {n}: {sizes[n - 1]:,}" for n in (10, steps // 3, 2 * steps // 3, steps))
+        print(f"{label:>12}: prompt tokens {checkpoints}; {1000 * elapsed / steps:.3f} ms/step, "
+              f"{manager.folded} entries folded")
+
+
+if __name__ == '__main__':
+    benchmark_session()
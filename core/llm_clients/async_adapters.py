@@ -0,0 +1,49 @@
+# core/llm_clients/async_adapters.py
+import asyncio
+
+from core.llm_clients.limiter import llm_limiter
+
+
+class AsyncGeminiClient:
+    """
+    Async wrapper around a google.generativeai GenerativeModel.
+    Uses the SDK's native generate_content_async when available and falls back
+    to running the blocking call in a worker thread. Every request goes through
+    the process-wide LLM concurrency limiter.
+    """
+    def __init__(self, model, limiter=llm_limiter):
+        self.model = model
+        self.limiter = limiter
+
+    async def generate(self, prompt):
+        async with self.limiter:
+            if hasattr(self.model, "generate_content_async"):
+                response = await self.model.generate_content_async(prompt)
+            else:
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+    async def stream(self, prompt):
+        """Yields the reply text chunk by chunk. Close the generator (e.g. with aclosing) to free the limiter slot early."""
+        async with self.limiter:
+            if hasattr(self.model, "generate_content_async"):
+                response = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    yield chunk.text
+            else:
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
+                yield response.text
+
+
+class AsyncCallableClient:
+    """
+    Async wrapper for any blocking model call, e.g. JaraxxusAgent._call_model.
+    The call runs in a worker thread while holding a limiter slot.
+    """
+    def __init__(self, call, limiter=llm_limiter):
+        self.call = call
+        self.limiter = limiter
+
+    async def generate(self, *args, **kwargs):
+        async with self.limiter:
+            return await asyncio.to_thread(self.call, *args, **kwargs)
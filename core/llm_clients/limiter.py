@@ -0,0 +1,89 @@
+# core/llm_clients/limiter.py
+import asyncio
+from collections import deque
+from threading import Condition
+
+from core.app_config import settings
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of outbound LLM requests in flight across the whole process.
+
+    It can be used from worker threads (`with limiter:`) and from coroutines
+    (`async with limiter:`). Both share the same slots, so the limit holds no
+    matter which agent runtime issued the request. Async waiters never block
+    the event loop: they wait on a future that is resolved when a slot frees up.
+    """
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._cond = Condition()
+        self._async_waiters = deque()  # (loop, future) pairs, served before blocked threads
+
+    # --- Synchronous use -------------------------------------------------
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self._take_slot()
+
+    def release(self):
+        with self._cond:
+            # Hand the slot straight to a waiting coroutine if there is one
+            while self._async_waiters:
+                loop, future = self._async_waiters.popleft()
+                if loop.is_closed() or future.done():
+                    continue
+                loop.call_soon_threadsafe(self._grant, future)
+                return
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    # --- Asynchronous use ------------------------------------------------
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self.in_flight < self.limit:
+                self._take_slot()
+                return
+            future = loop.create_future()
+            self._async_waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # If the slot was already handed to us, pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _grant(self, future):
+        # Runs on the waiter's event loop. The slot was transferred without
+        # decrementing in_flight, so a cancelled waiter must give it back.
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _take_slot(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+
+# Process-wide limiter shared by every agent and model client
+llm_limiter = ConcurrencyLimiter(settings.get("LLM_MAX_CONCURRENCY", 8))
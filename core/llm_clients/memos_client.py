@@ -1,56 +1,310 @@
 # jaraxxus_v2-gmni/core/llm_clients/memos_client.py
 
-from memos.mem_os.main import MOS
-from memos.configs.mem_os import MOSConfig
-from memos.configs.llm import LLMConfigFactory
-from memos.configs.embedder import EmbedderConfigFactory
+import re
+import time
+import atexit
+from collections import OrderedDict
+from threading import Event, Lock, Thread
 from typing import List, Dict, Any
+from core.app_config import settings
+
+# One MOS instance (and so one copy of the LLM and embedding models) per process,
+# loaded on first use and shared by every client
+_shared_mos = None
+_mos_lock = Lock()
+_created_users = set()
+_clients = {}
+_clients_lock = Lock()
+
+
+def _build_mos():
+    """Loads the LLM and embedding backends into a new MOS instance. Slow: seconds and hundreds of MB."""
+    from memos.mem_os.main import MOS
+    from memos.configs.mem_os import MOSConfig
+    from memos.configs.llm import LLMConfigFactory
+    from memos.configs.embedder import EmbedderConfigFactory
+
+    # --- THE LITERAL INTERPRETATION OF THE ERROR MESSAGE ---
+    # The 'config' field is a simple string: the model's name.
+    llm_params = {
+        "provider": "huggingface",
+        "config": "google/flan-t5-small"  # Just the string
+    }
+    embedding_params = {
+        "provider": "sentence_transformer",
+        "config": "sentence-transformers/all-MiniLM-L6-v2" # Just the string
+    }
+    # --- END FIX ---
+
+    llm_conf_factory = LLMConfigFactory(backend=llm_params)
+    embedding_conf_factory = EmbedderConfigFactory(backend=embedding_params)
+
+    top_level_config = MOSConfig(llm_config=llm_conf_factory, embedding_config=embedding_conf_factory)
+    return MOS(config=top_level_config)
+
+
+def _build_backend():
+    """The memory backend chosen by MEMORY_BACKEND: MemoryOS, or the local vector index."""
+    if settings.get("MEMORY_BACKEND", "memos") == "local":
+        from core.llm_clients.vector_memory import LocalVectorMemory
+        return LocalVectorMemory()
+    return _build_mos()
+
+
+def get_shared_mos():
+    """Returns the process-wide memory backend, loading it on the first call. Concurrent callers wait for the load."""
+    global _shared_mos
+    with _mos_lock:
+        if _shared_mos is None:
+            print("Loading MemoryOS models...")
+            start = time.perf_counter()
+            _shared_mos = _build_backend()
+            print(f"MemoryOS models loaded in {time.perf_counter() - start:.1f}s.")
+        return _shared_mos
+
+
+def _ensure_user(mos, user_id):
+    with _mos_lock:
+        if user_id not in _created_users:
+            mos.create_user(user_id=user_id)
+            _created_users.add(user_id)
+            print(f"MemoryOS user created: {user_id}")
+
+
+def get_memos_client(user_id: str = "jaraxxus_default_user") -> "MemOSClient":
+    """Returns the shared client for a user, creating it on first request. Cheap: models load on first use."""
+    with _clients_lock:
+        client = _clients.get(user_id)
+        if client is None:
+            client = _clients[user_id] = MemOSClient(user_id=user_id)
+        return client
+
+
+def warm_up() -> Thread:
+    """Loads the shared MOS models in a background thread so the first save or recall doesn't wait for them."""
+    def load():
+        try:
+            get_shared_mos()
+        except Exception as e:
+            print(f"MemoryOS warm-up failed: {e}")
+    thread = Thread(target=load, name="memos-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a recall query: case, surrounding punctuation and repeated whitespace don't matter."""
+    return " ".join(re.sub(r"[^\w\s]+$", "", query.strip().lower()).split())
+
 
 class MemOSClient:
     """
     A client to interact with the MemTensor/MemoryOS library, providing
     a persistent memory store for agents.
+
+    Clients are cheap to create: the MOS instance and its models are shared
+    by all clients in the process and only loaded on the first save or recall
+    (use get_memos_client() to share one client per user, and warm_up() to
+    load the models ahead of time).
+
+    Saves are queued and written to MOS in one bulk `add` per flush, either
+    every `flush_interval` seconds from a background thread or as soon as
+    `batch_size` messages are waiting. Recalls go through an LRU cache keyed
+    by the normalized query; any save clears it, and pending saves are
+    flushed before searching so a recall always sees earlier writes.
+
+    The store behind the client is pluggable: anything with MOS's `add`,
+    `search` and `create_user` calls works, such as the on-disk vector index
+    in vector_memory.LocalVectorMemory. Pass it as `backend`, or set
+    MEMORY_BACKEND = "local" to use it for the shared instance.
     """
-    def __init__(self, user_id: str = "jaraxxus_default_user"):
+    def __init__(self, user_id: str = "jaraxxus_default_user", flush_interval: float = None,
+                 batch_size: int = None, cache_size: int = None, backend=None):
         """
         Initializes the MemoryOS client.
         """
-        print(f"Initializing MemoryOS for user: {user_id}...")
-
-        # --- THE LITERAL INTERPRETATION OF THE ERROR MESSAGE ---
-        # The 'config' field is a simple string: the model's name.
-        llm_params = {
-            "provider": "huggingface",
-            "config": "google/flan-t5-small"  # Just the string
-        }
-        embedding_params = {
-            "provider": "sentence_transformer",
-            "config": "sentence-transformers/all-MiniLM-L6-v2" # Just the string
-        }
-        # --- END FIX ---
-
-        llm_conf_factory = LLMConfigFactory(backend=llm_params)
-        embedding_conf_factory = EmbedderConfigFactory(backend=embedding_params)
-
-        top_level_config = MOSConfig(llm_config=llm_conf_factory, embedding_config=embedding_conf_factory)
-
-        self.mos = MOS(config=top_level_config)
+        print(f"Initializing MemoryOS client for user: {user_id}...")
         self.user_id = user_id
-        self.mos.create_user(user_id=self.user_id)
-        print("MemoryOS Initialized and user created.")
+        self._backend = backend
+
+        self.flush_interval = flush_interval or settings.get("MEMOS_FLUSH_INTERVAL", 2.0)
+        self.batch_size = batch_size or settings.get("MEMOS_BATCH_SIZE", 32)
+        self.cache_size = cache_size or settings.get("MEMOS_RECALL_CACHE_SIZE", 256)
+
+        self._pending = []
+        self._pending_lock = Lock()
+        self._flush_lock = Lock() # Serializes bulk adds so messages reach MOS in order
+        self._cache = OrderedDict()
+        self._cache_lock = Lock() # Also guards _metrics, which caller threads and the flusher both update
+        self._generation = 0 # Bumped on every save; stale search results are not cached
+        self._metrics = {"saves": 0, "flushes": 0, "messages_flushed": 0, "add_seconds": 0.0,
+                         "searches": 0, "search_seconds": 0.0, "cache_hits": 0, "cache_misses": 0}
+
+        self._stop = Event()
+        self._flusher = Thread(target=self._flush_loop, name=f"memos-flush-{user_id}", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    @property
+    def mos(self):
+        """The client's backend (by default the shared MOS instance), with this client's user created in it."""
+        if self._backend is not None:
+            return self._backend
+        mos = get_shared_mos()
+        if self.user_id not in _created_users:
+            _ensure_user(mos, self.user_id)
+        return mos
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"CLIENT: Background memory flush failed, will retry: {e}")
 
     def save_memory(self, content: List[Dict[str, str]]) -> Dict[str, Any]:
-        print(f"CLIENT: Saving memory: {content}")
-        result = self.mos.add(messages=content, user_id=self.user_id)
-        return result
+        """Queues messages for the next bulk add. Returns how many messages are waiting."""
+        with self._pending_lock:
+            self._pending.extend(content)
+            waiting = len(self._pending)
+        with self._cache_lock:
+            self._metrics["saves"] += 1
+            self._generation += 1
+            self._cache.clear()
+        if waiting >= self.batch_size:
+            self.flush()
+        return {"queued": waiting}
+
+    def flush(self) -> Dict[str, Any]:
+        """Writes all queued messages to MOS in a single add call."""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return {}
+            try:
+                mos = self.mos # May load the models; not counted as add time
+                start = time.perf_counter()
+                result = mos.add(messages=batch, user_id=self.user_id)
+            except Exception:
+                with self._pending_lock:
+                    self._pending[:0] = batch # Keep them for the next attempt
+                raise
+            elapsed = time.perf_counter() - start
+            with self._cache_lock:
+                self._metrics["add_seconds"] += elapsed
+                self._metrics["flushes"] += 1
+                self._metrics["messages_flushed"] += len(batch)
+            print(f"CLIENT: Flushed {len(batch)} messages to memory.")
+            return result
+
+    def _search(self, query: str) -> Dict[str, Any]:
+        mos = self.mos
+        start = time.perf_counter()
+        results = mos.search(query=query, user_id=self.user_id)
+        elapsed = time.perf_counter() - start
+        with self._cache_lock:
+            self._metrics["search_seconds"] += elapsed
+            self._metrics["searches"] += 1
+        return results
 
     def recall_memory(self, query: str) -> Dict[str, Any]:
         print(f"CLIENT: Recalling memory for query: '{query}'")
-        results = self.mos.search(query=query, user_id=self.user_id)
-        print(f"CLIENT: Found memories.")
-        return results
+        return self.recall_many([query])[query]
+
+    def recall_many(self, queries: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Recalls several queries in one call. Queries that normalize to the same
+        key are searched once, and cached results are reused. Returns {query: results}.
+        """
+        # Snapshot the generation before flushing: a save landing after the flush bumps it,
+        # so results that miss that save are not cached
+        with self._cache_lock:
+            generation = self._generation
+        self.flush() # Read-your-writes: queued saves must be searchable
+        keys = {query: normalize_query(query) for query in queries}
+        found = {}
+        with self._cache_lock:
+            for key in set(keys.values()):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+            self._metrics["cache_hits"] += len(found)
+
+        missing = [key for key in dict.fromkeys(keys.values()) if key not in found]
+        for key in missing:
+            found[key] = self._search(next(q for q, k in keys.items() if k == key))
+        with self._cache_lock:
+            self._metrics["cache_misses"] += len(missing)
+            if generation == self._generation: # Nothing was saved while we searched
+                for key in missing:
+                    self._cache[key] = found[key]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if missing:
+            print(f"CLIENT: Found memories.")
+        return {query: found[key] for query, key in keys.items()}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters and timings for saves, bulk adds, searches and the recall cache."""
+        with self._cache_lock:
+            metrics = dict(self._metrics)
+        lookups = metrics["cache_hits"] + metrics["cache_misses"]
+        metrics["cache_hit_rate"] = metrics["cache_hits"] / lookups if lookups else 0.0
+        metrics["avg_add_ms"] = 1000 * metrics["add_seconds"] / metrics["flushes"] if metrics["flushes"] else 0.0
+        metrics["avg_search_ms"] = 1000 * metrics["search_seconds"] / metrics["searches"] if metrics["searches"] else 0.0
+        with self._pending_lock:
+            metrics["pending"] = len(self._pending)
+        return metrics
+
+    def close(self):
+        """Stops the background flusher and writes anything still queued."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+def _startup_probe(mode, num_agents):
+    """Run in a child process: starts num_agents agents' memory and prints seconds taken and peak RSS in MB."""
+    import resource
+    start = time.perf_counter()
+    if mode == "per-agent":
+        # What every agent building its own MemOSClient used to cost: one MOS load each
+        for i in range(num_agents):
+            _build_mos().create_user(user_id=f"agent_{i}")
+    else:
+        for i in range(num_agents):
+            get_memos_client(f"agent_{i}").mos # First use loads the shared models once
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def benchmark_startup(agent_counts=(1, 2, 4)):
+    """Startup time and peak RSS for N agents with per-agent MOS instances vs. the shared registry."""
+    import os
+    import subprocess
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    for num_agents in agent_counts:
+        for mode in ("per-agent", "shared"):
+            out = subprocess.run(
+                [sys.executable, "-m", "core.llm_clients.memos_client", "startup-probe", mode, str(num_agents)],
+                cwd=project_root, capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            elapsed, rss = (float(v) for v in out.split())
+            print(f"{num_agents} agent{'s' if num_agents != 1 else ' '} {mode:>9}: {elapsed:6.2f}s, peak RSS {rss:7.1f} MB")
+
 
 if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "startup-probe":
+        _startup_probe(sys.argv[2], int(sys.argv[3]))
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "startup":
+        benchmark_startup()
+        sys.exit()
+
     print("--- Running MemOSClient self-test ---")
     client = MemOSClient(user_id="self_test_user_13")
 
@@ -70,4 +324,11 @@ if __name__ == '__main__':
     recalled_memories = client.recall_memory(query="Where do I live?")
     print("Recall Results:", recalled_memories.get('text_mem'))
 
+    print("\n--- Recalling the same question again (served from the recall cache) ---")
+    recalled_memories = client.recall_memory(query="  where do I live ")
+    print("Recall Results:", recalled_memories.get('text_mem'))
+
+    print("\n--- Metrics ---")
+    print(client.metrics())
+
     print("\n--- Self-test complete ---")
@@ -0,0 +1,365 @@
+# core/llm_clients/vector_memory.py
+import json
+import os
+import re
+import time
+from threading import Lock, RLock
+from typing import List, Dict, Any
+
+import numpy as np
+
+from core.app_config import settings
+
+# Files start with room for this many vectors and double when full
+INITIAL_CAPACITY = 1024
+# Below this many memories every query scans them all; the IVF index is trained once there are more
+MIN_TRAIN_SIZE = 20000
+# The index is retrained (new centroids, every memory reassigned) each time the store grows this much
+TRAIN_GROWTH = 4
+# k-means runs on a sample of at most this many points per list
+TRAIN_POINTS_PER_LIST = 64
+KMEANS_ITERATIONS = 8
+# Rows multiplied against the centroids at a time while assigning lists
+ASSIGN_BATCH = 16384
+
+_embedder = None
+_embedder_lock = Lock()
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embeds texts with the shared sentence-transformers model, loaded on first use. Rows are unit length."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            from sentence_transformers import SentenceTransformer
+            model_name = settings.get("MEMORY_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+            print(f"Loading embedding model {model_name}...")
+            _embedder = SentenceTransformer(model_name)
+    return _embedder.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+
+def _nearest(vectors, centroids):
+    """Index of the most similar centroid for each row, computed in batches to bound memory."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        block = np.asarray(vectors[start:start + ASSIGN_BATCH])
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def _kmeans(points, k, rng, iterations=KMEANS_ITERATIONS):
+    """Spherical k-means: centroids are kept unit length so the dot product ranks them."""
+    centroids = points[rng.choice(len(points), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(points, centroids)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = counts > 0
+        starts = np.cumsum(counts) - counts
+        sums = np.add.reduceat(points[np.argsort(assign, kind="stable")], starts[nonempty])
+        centroids[nonempty] = sums
+        # An empty list gets a random point so no centroid is wasted
+        empty = np.flatnonzero(~nonempty)
+        centroids[empty] = points[rng.choice(len(points), len(empty), replace=False)]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class VectorStore:
+    """
+    An append-only store of unit vectors with an IVF (inverted file) index,
+    kept in one directory:
+
+        vectors.f32   float32 rows, memory-mapped and doubled in size when full
+        lists.i32     the IVF list each row belongs to (-1 before the first training)
+        offsets.i64   where each row's record starts in records.jsonl
+        records.jsonl one JSON record per row
+        centroids.npy the IVF centroids
+        meta.json     dimension, row count and training state
+
+    Inserts are incremental: new rows are written in place and assigned to the
+    nearest existing centroid. Small stores are searched exhaustively; from
+    MIN_TRAIN_SIZE rows a query only scans the `nprobe` lists whose centroids
+    are closest to it. The centroids are retrained whenever the store has
+    grown TRAIN_GROWTH times since the last training, so lists stay balanced.
+
+    meta.json is written last, so rows from an add that was interrupted are
+    ignored on the next open. One process should write to a store at a time.
+    """
+    def __init__(self, directory: str, nlist: int = None, nprobe: int = None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.nlist = nlist or settings.get("MEMORY_IVF_LISTS")
+        self.nprobe = nprobe or settings.get("MEMORY_IVF_PROBE", 16)
+        self._lock = RLock()
+
+        meta = {}
+        if os.path.exists(self._path("meta.json")):
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        self.dim = meta.get("dim")
+        self.count = meta.get("count", 0)
+        self.trained_count = meta.get("trained_count", 0)
+        self.centroids = None
+        if self.trained_count and os.path.exists(self._path("centroids.npy")):
+            self.centroids = np.load(self._path("centroids.npy"))
+
+        self.capacity = 0
+        self._vectors = self._lists = self._offsets = None
+        if self.dim:
+            self.capacity = os.path.getsize(self._path("vectors.f32")) // (4 * self.dim)
+            self._map()
+        self._rebuild_postings()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _map(self):
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+        self._lists = np.memmap(self._path("lists.i32"), dtype=np.int32, mode="r+", shape=(self.capacity,))
+        self._offsets = np.memmap(self._path("offsets.i64"), dtype=np.int64, mode="r+", shape=(self.capacity,))
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * self.capacity, INITIAL_CAPACITY)
+        self._vectors = self._lists = self._offsets = None # Release the old mappings before resizing
+        for name, row_bytes in (("vectors.f32", 4 * self.dim), ("lists.i32", 4), ("offsets.i64", 8)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self.capacity = capacity
+        self._map()
+
+    def _save_meta(self):
+        for array in (self._vectors, self._lists, self._offsets):
+            array.flush()
+        meta = {"dim": self.dim, "count": self.count, "trained_count": self.trained_count}
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _rebuild_postings(self):
+        """Groups row ids by IVF list from lists.i32."""
+        self._tails = {}
+        self._tail_rows = 0
+        if self.centroids is None or not self.count:
+            self._postings = []
+            return
+        lists = np.asarray(self._lists[:self.count])
+        order = np.argsort(lists, kind="stable")
+        bounds = np.cumsum(np.bincount(lists, minlength=len(self.centroids)))[:-1]
+        self._postings = np.split(order.astype(np.int64), bounds)
+
+    def _assign(self, start, end):
+        """Puts rows [start, end) in the list of their nearest centroid."""
+        if self.centroids is None:
+            self._lists[start:end] = -1
+            return
+        lists = _nearest(self._vectors[start:end], self.centroids)
+        self._lists[start:end] = lists
+        order = np.argsort(lists, kind="stable")
+        bounds = np.flatnonzero(np.diff(lists[order])) + 1
+        for group in np.split(order, bounds):
+            self._tails.setdefault(int(lists[group[0]]), []).append(group + start)
+        self._tail_rows += end - start
+        if self._tail_rows > self.count // 8:
+            self._rebuild_postings() # Merge the small per-add arrays back into one array per list
+
+    def _train(self):
+        rng = np.random.default_rng(self.count)
+        nlist = int(self.nlist or np.clip(np.sqrt(self.count), 16, 4096))
+        sample_size = min(self.count, TRAIN_POINTS_PER_LIST * nlist)
+        sample = np.asarray(self._vectors[np.sort(rng.choice(self.count, sample_size, replace=False))])
+        start = time.perf_counter()
+        self.centroids = _kmeans(sample, min(nlist, sample_size), rng)
+        np.save(self._path("centroids.tmp.npy"), self.centroids)
+        os.replace(self._path("centroids.tmp.npy"), self._path("centroids.npy"))
+        self._lists[:self.count] = _nearest(self._vectors[:self.count], self.centroids)
+        self.trained_count = self.count
+        self._rebuild_postings()
+        print(f"Memory index trained: {len(self.centroids)} lists over {self.count:,} memories "
+              f"in {time.perf_counter() - start:.1f}s.")
+
+    def add(self, vectors, records: List[Dict[str, Any]]) -> List[int]:
+        """Appends one vector and one JSON-serializable record per row. Returns the new row ids."""
+        if not records:
+            return []
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(records), -1))
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}.")
+            first = self.count
+            if first + len(records) > self.capacity:
+                self._grow(first + len(records))
+
+            offsets = []
+            with open(self._path("records.jsonl"), "ab") as f:
+                # Start from the committed end: drops any records of an add that never reached meta.json
+                position = int(self._offsets[first - 1]) if first else 0
+                if first:
+                    f.seek(position)
+                    position += len(self._read_line(first - 1))
+                f.truncate(position)
+                for record in records:
+                    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    f.write(line)
+                    offsets.append(position)
+                    position += len(line)
+            self._offsets[first:first + len(records)] = offsets
+            self._vectors[first:first + len(records)] = vectors
+            self.count += len(records)
+
+            if self.count >= MIN_TRAIN_SIZE and self.count >= TRAIN_GROWTH * self.trained_count:
+                self._train()
+            else:
+                self._assign(first, self.count)
+            self._save_meta()
+            return list(range(first, self.count))
+
+    def _read_line(self, row):
+        with open(self._path("records.jsonl"), "rb") as f:
+            f.seek(int(self._offsets[row]))
+            return f.readline()
+
+    def records(self, ids: List[int]) -> List[Dict[str, Any]]:
+        with self._lock, open(self._path("records.jsonl"), "rb") as f:
+            out = []
+            for row in ids:
+                f.seek(int(self._offsets[row]))
+                out.append(json.loads(f.readline()))
+            return out
+
+    def search(self, vector, k: int = 10, nprobe: int = None, exact: bool = False):
+        """
+        Returns up to k (row_id, cosine_similarity) pairs, best first. Scans the
+        nprobe closest IVF lists, or every row when exact=True or the index
+        isn't trained yet.
+        """
+        query = _normalize(np.asarray(vector, dtype=np.float32).ravel())
+        with self._lock:
+            if not self.count:
+                return []
+            if exact or self.centroids is None:
+                ids = None
+                scores = self._vectors[:self.count] @ query
+            else:
+                nprobe = min(nprobe or self.nprobe, len(self.centroids))
+                closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+                parts = []
+                for list_id in closest:
+                    parts.append(self._postings[list_id])
+                    parts.extend(self._tails.get(int(list_id), ()))
+                ids = np.sort(np.concatenate(parts)) # Read rows in file order
+                if not len(ids):
+                    return []
+                scores = self._vectors[ids] @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if ids is None else ids[top]
+        return [(int(row), float(scores[i])) for row, i in zip(rows, top)]
+
+
+class LocalVectorMemory:
+    """
+    A memory backend with the same add/search/create_user calls MemOSClient
+    makes on MOS, so it can stand in for MemoryOS (MEMORY_BACKEND = "local").
+
+    Each user gets a VectorStore under `directory`. Messages are embedded in
+    one batch per add (MemOSClient already sends a whole flush at once) and
+    search results come back in MOS's shape: {"text_mem": [{"cube_id",
+    "memories": [...]}]}, where each memory has its text under "memory".
+    """
+    def __init__(self, directory: str = None, embed_fn=None, top_k: int = None):
+        self.directory = directory or settings.get("MEMORY_DIR", "jaraxxus_memory")
+        self.embed_fn = embed_fn or embed_texts
+        self.top_k = top_k or settings.get("MEMORY_TOP_K", 5)
+        self._stores = {}
+        self._lock = Lock()
+
+    def store(self, user_id: str) -> VectorStore:
+        with self._lock:
+            store = self._stores.get(user_id)
+            if store is None:
+                path = os.path.join(self.directory, re.sub(r"[^\w.-]", "_", user_id))
+                store = self._stores[user_id] = VectorStore(path)
+            return store
+
+    def create_user(self, user_id: str):
+        self.store(user_id)
+
+    def add(self, messages: List[Dict[str, str]], user_id: str) -> Dict[str, Any]:
+        messages = [m for m in messages if m.get("content")]
+        if not messages:
+            return {"added": 0}
+        vectors = self.embed_fn([m["content"] for m in messages])
+        now = time.time()
+        records = [{"role": m.get("role", "user"), "content": m["content"], "created_at": now} for m in messages]
+        ids = self.store(user_id).add(vectors, records)
+        return {"added": len(ids)}
+
+    def search(self, query: str, user_id: str, top_k: int = None) -> Dict[str, Any]:
+        store = self.store(user_id)
+        hits = store.search(self.embed_fn([query])[0], k=top_k or self.top_k)
+        records = store.records([row for row, _ in hits])
+        memories = [{"id": row, "memory": record["content"], "role": record["role"],
+                     "created_at": record["created_at"], "score": score}
+                    for (row, score), record in zip(hits, records)]
+        return {"text_mem": [{"cube_id": user_id, "memories": memories}]}
+
+
+def _clustered_vectors(rng, centers, n, noise=0.6):
+    """Unit vectors scattered around random topic centers, a rough stand-in for sentence embeddings."""
+    picks = rng.integers(len(centers), size=n)
+    points = centers[picks] + rng.standard_normal((n, centers.shape[1]), dtype=np.float32) * (noise / np.sqrt(centers.shape[1]))
+    return _normalize(points).astype(np.float32)
+
+
+def benchmark_recall(sizes=(10_000, 100_000, 1_000_000), dim=384, num_queries=100, k=10):
+    """
+    Recall latency of the IVF index against an exhaustive scan of the same
+    store, with recall@k of the IVF results. Uses synthetic clustered vectors,
+    so no embedding model is needed.
+    """
+    import shutil
+    import tempfile
+    rng = np.random.default_rng(0)
+    centers = _normalize(rng.standard_normal((2000, dim), dtype=np.float32))
+    queries = _clustered_vectors(rng, centers, num_queries)
+    for size in sizes:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = VectorStore(tmp_dir)
+            start = time.perf_counter()
+            for first in range(0, size, 50_000):
+                n = min(50_000, size - first)
+                store.add(_clustered_vectors(rng, centers, n), [{"content": f"memory {first + i}"} for i in range(n)])
+            build = time.perf_counter() - start
+
+            timings = {}
+            results = {}
+            for label, exact in (("exhaustive", True), ("ivf", False)):
+                store.search(queries[0], k, exact=exact) # Page the store in before timing
+                start = time.perf_counter()
+                results[label] = [store.search(q, k, exact=exact) for q in queries]
+                timings[label] = 1000 * (time.perf_counter() - start) / num_queries
+            recall = np.mean([len({r for r, _ in a} & {r for r, _ in b}) / k
+                              for a, b in zip(results["ivf"], results["exhaustive"])])
+            if store.centroids is None:
+                index = "not trained, every query is exhaustive"
+            else:
+                index = f"{len(store.centroids)} lists, nprobe {store.nprobe}"
+            print(f"{size:>9,} memories: build {build:6.1f}s, exhaustive {timings['exhaustive']:7.2f} ms/query, "
+                  f"ivf {timings['ivf']:6.2f} ms/query ({index}), recall@{k} {recall:.3f}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import sys
+    benchmark_recall(tuple(int(n) for n in sys.argv[1:]) or (10_000, 100_000, 1_000_000))
@@ -0,0 +1,126 @@
+# core/prompt_builder.py
+import hashlib
+from core.context_manager import estimate_tokens
+
+_PROMPT_SUFFIX = """
+
+        Based on the history, decide on the next step. You have two choices:
+        1.  Use a tool: Respond with a single JSON object:
+            {"thought": "<reasoning>", "tool_to_use": "<tool_name>", "tool_input": {<json_args>}}
+        2.  Finish the task: If you have the final answer for the user, respond with:
+            {"thought": "<summary of what was accomplished>", "final_answer": "<your complete and final answer to the user>"}
+        """
+
+
+class ToolCatalog:
+    """
+    Renders the tool section of the agent prompt once and caches it.
+    The cached text is keyed by a version hash of the tools' names,
+    descriptions and schemas, so it is only re-rendered when a tool changes.
+    """
+    def __init__(self, tools):
+        self.tools = tools
+        self.version = None
+        self._signature = None
+        self._rendered = ""
+
+    def _compute_signature(self):
+        parts = []
+        for tool_name, tool_module in self.tools.items():
+            description = getattr(tool_module, 'DESCRIPTION', 'No description.')
+            args_schema = getattr(tool_module, 'ARGS_SCHEMA', '{}')
+            parts.append((tool_name, description, args_schema))
+        return parts
+
+    def render(self):
+        """Returns the rendered tool catalog, re-rendering only if the tools changed."""
+        signature = self._compute_signature()
+        if signature != self._signature:
+            tool_details = [
+                f"- Tool: `{tool_name}`\n  Description: {description}\n  Arguments (JSON): {args_schema}"
+                for tool_name, description, args_schema in signature
+            ]
+            self._rendered = "\n".join(tool_details)
+            self._signature = signature
+            self.version = hashlib.sha1(self._rendered.encode("utf-8")).hexdigest()[:12]
+        return self._rendered
+
+
+class PromptBuilder:
+    """
+    Incrementally assembles the prompt for one task.
+
+    The prompt is split into a cached prefix (persona + tool catalog), a list of
+    history segments and a fixed suffix. Each call to build() only renders the
+    history segments added since the previous call, and records the size of
+    every step in `stats` so prompt growth can be inspected.
+
+    With a `context` (a ContextManager) that has a token budget, the history
+    is instead fitted to that budget on every build: the task and the newest
+    segments are kept verbatim and older segments are folded into a summary.
+    Without a budget the incremental append is kept.
+    """
+    def __init__(self, agent_name, catalog, task, context=None):
+        self.agent_name = agent_name
+        self.catalog = catalog
+        self.context = context
+        self.segments = [f"USER_TASK: {task}"]
+        self.stats = []
+        self._prefix = ""
+        self._prefix_version = None
+        self._history = ""
+        self._rendered_count = 0
+
+    def add_segment(self, text):
+        """Appends a new history segment (e.g. a tool result)."""
+        self.segments.append(text)
+
+    def _render_prefix(self):
+        tools_string = self.catalog.render()
+        if self.catalog.version != self._prefix_version:
+            self._prefix = f"""
+        You are an autonomous AI agent named {self.agent_name}. Your goal is to accomplish the user's task by breaking it down into steps and using the available tools.
+
+        Available Tools:
+        {tools_string}
+
+        Conversation History (User's Task and results from previous tool executions):
+        """
+            self._prefix_version = self.catalog.version
+            return True
+        return False
+
+    def build(self):
+        """Returns the full prompt, rendering only the parts that changed since the last call."""
+        prefix_changed = self._render_prefix()
+
+        # Only the segments added since the last step are rendered and appended
+        new_segments = self.segments[self._rendered_count:]
+        if self.context is not None and self.context.budget_tokens:
+            reserved = estimate_tokens(self._prefix) + estimate_tokens(_PROMPT_SUFFIX)
+            self._history = "\n".join(self.context.fit_segments(self.segments, pinned=1, reserved_tokens=reserved))
+            self._rendered_count = len(self.segments)
+        elif new_segments:
+            rendered = "\n".join(new_segments)
+            self._history = f"{self._history}\n{rendered}" if self._history else rendered
+            self._rendered_count = len(self.segments)
+
+        prompt = self._prefix + self._history + _PROMPT_SUFFIX
+        self.stats.append({
+            "step": len(self.stats) + 1,
+            "catalog_version": self._prefix_version,
+            "prefix_rerendered": prefix_changed,
+            "prefix_chars": len(self._prefix),
+            "history_chars": len(self._history),
+            "new_chars": sum(len(s) for s in new_segments),
+            "folded_segments": self.context.folded if self.context is not None else 0,
+            "prompt_chars": len(prompt),
+        })
+        return prompt
+
+    def summary(self):
+        """Short human-readable description of prompt growth across steps."""
+        sizes = ", ".join(str(s["prompt_chars"]) for s in self.stats)
+        folded = self.stats[-1]["folded_segments"] if self.stats else 0
+        compacted = f", {folded} segments folded into a summary" if folded else ""
+        return f"{len(self.stats)} steps, prompt sizes (chars): [{sizes}]{compacted}"
@@ -0,0 +1,95 @@
+# core/streaming.py
+import itertools
+import time
+
+# Update-queue events for streamed output. Plain strings are still used for
+# everything else; the GUI recognises these dicts by their "type" key.
+STREAM_START = "stream_start"
+STREAM_DELTA = "stream_delta"
+STREAM_END = "stream_end"
+
+_stream_ids = itertools.count(1)
+
+
+class JsonObjectScanner:
+    """
+    Finds the first complete top-level JSON object in text that arrives in pieces.
+    Only the new characters are scanned on each feed, tracking brace depth and
+    string/escape state, so the object can be parsed the moment its closing
+    brace arrives. Text around the object (e.g. ```json fences) is ignored.
+    """
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.result = None
+
+    def feed(self, chunk):
+        """Adds a chunk of text. Returns the object's source text once it is complete, else None."""
+        if self.result is not None:
+            return self.result
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._start < 0:
+                if ch == "{":
+                    self._start, self._depth = i, 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.result = text[self._start:i + 1]
+                    self._pos = i + 1
+                    return self.result
+        self._pos = len(text)
+        return None
+
+
+class ReplyStream:
+    """
+    Forwards a streamed LLM reply to the update queue as incremental events and
+    watches it for a complete JSON action, so the caller can stop reading and
+    act on it straight away.
+    """
+    def __init__(self, update_queue, header):
+        self.update_queue = update_queue
+        self.stream_id = next(_stream_ids)
+        self.scanner = JsonObjectScanner()
+        self.started_at = time.monotonic()
+        self.first_chunk_at = None
+        self.update_queue.put({"type": STREAM_START, "stream_id": self.stream_id, "text": header})
+
+    def feed(self, chunk):
+        """Publishes a chunk. Returns True once a complete JSON object has arrived."""
+        if not chunk:
+            return False
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.monotonic()
+        self.update_queue.put({"type": STREAM_DELTA, "stream_id": self.stream_id, "text": chunk})
+        return self.scanner.feed(chunk) is not None
+
+    def close(self):
+        """Ends the stream. Returns the JSON object text if one was found, else everything received."""
+        first_token_s = None if self.first_chunk_at is None else self.first_chunk_at - self.started_at
+        self.update_queue.put({
+            "type": STREAM_END,
+            "stream_id": self.stream_id,
+            "first_token_s": first_token_s,
+            "total_s": time.monotonic() - self.started_at,
+        })
+        return self.scanner.result if self.scanner.result is not None else self.scanner.text
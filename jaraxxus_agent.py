@@ -1,15 +1,22 @@
 import json
 import re
+import asyncio
 from typing import List, Tuple, Dict, Any, Optional
 import config
 import tools # Make sure your tools package is properly loaded
+from core.llm_clients.async_adapters import AsyncCallableClient
+from core.context_manager import create_context_manager
 
 class JaraxxusAgent:
     def __init__(self):
         # Load tools (name -> function) and tool descriptions
         self.tools = tools.load_tools()
+        # Async adapter for the blocking model call, shared by all process_async calls
+        self.async_model = AsyncCallableClient(self._call_model)
         # Conversation history (excluding system prompt)
         self.history: List[Dict[str, str]] = []
+        # Keeps the messages sent to the model under the context budget as the history grows
+        self.context = create_context_manager("jaraxxus_default_user")
         # System prompt template for tool usage instructions
         self.system_prompt_template = """You are Jaraxxus, a powerful AI assistant with tool-using capabilities.
 You have access to the following tools. You must use them to answer the user's request.
@@ -112,12 +119,20 @@ Begin now.
         # ... (no changes needed)
         pass
 
+    async def _call_model_async(self, messages: List[Dict[str, str]]) -> str:
+        """Runs the blocking _call_model in a worker thread under the global LLM concurrency limit."""
+        return await self.async_model.generate(messages)
+
     def _parse_action_json(self, text: str) -> Optional[Dict[str, Any]]:
         # ... (no changes needed)
         pass
 
     def process(self, user_input: str) -> Tuple[str, List[str]]:
         """Process a user message through the agent, returning the assistant's answer and a list of log entries."""
+        return asyncio.run(self.process_async(user_input))
+
+    async def process_async(self, user_input: str) -> Tuple[str, List[str]]:
+        """Async version of process(); model calls and tools run without blocking the event loop."""
         logs: List[str] = []
         self.history.append({"role": "user", "content": user_input})
         system_prompt = self._build_system_prompt()
@@ -128,7 +143,7 @@ Begin now.
         
         for step in range(max_steps):
             try:
-                model_output = self._call_model(work_messages)
+                model_output = await self._call_model_async(self.context.fit(work_messages, pinned=1))
             except Exception as e:
                 err_msg = f"[ERROR] Model call failed: {e}"
                 logs.append(err_msg)
@@ -143,6 +158,7 @@ Begin now.
                 break # Treat as final answer
 
             action = str(action_data.get("action", ""))
+            tool_name = action
             action_input = action_data.get("action_input", "")
             
             # NEW: Add the model's thought process to the conversation history
@@ -162,15 +178,14 @@ Begin now.
                 tool_func = self.tools[tool_name]
                 try:
                     # The tool's run function will now handle the dict or string
-                    result = tool_func(action_input)
+                    result = await asyncio.to_thread(tool_func, action_input)
                     obs_text = str(result)
                 except Exception as e:
                     # Catch errors from within the tool itself
                     obs_text = f"Error executing tool '{tool_name}': {e}"
             
-            # Truncate long observations to keep the context window clean
-            if len(obs_text) > 2000:
-                obs_text = obs_text[:2000] + "... [truncated]"
+            # Shorten very long observations; the context manager keeps the whole prompt within budget
+            obs_text = self.context.clip(obs_text)
             
             logs.append("Observation: " + obs_text)
             # Add the observation to the conversation for the LLM's next step
@@ -1,78 +1,120 @@
 import time
 import json
+from threading import Event, Thread
+from queue import Queue
 from core.app_config import settings  # CORRECT: Uses the central settings object
 from tools import AVAILABLE_TOOLS      # CORRECT: Imports the dynamically loaded tools
 from core.base_agent import BaseAgent  # CORRECT: Imports our agent blueprint
-from threading import Thread
+from core.agent_pool import AgentWorkerPool
+from core.async_runtime import AsyncAgentRuntime
+from core.llm_clients import memos_client
+
+# Put on the command queue by stop() to wake up the blocking get in the main loop
+SHUTDOWN = object()
 
 class JaraxxusSupervisor:
-    def __init__(self, command_queue, update_queue):
+    def __init__(self, command_queue, update_queue, config_path='jaraxxus_config.json'):
         self.command_queue = command_queue
         self.update_queue = update_queue
-        self.is_running = False  # Initialize the flag here
+        self.config_path = config_path
+        self._shutdown = Event()  # Set by stop(); replaces polling a running flag
+        self._started = False
+        self.pools = {}  # agent name -> AgentWorkerPool, filled while loading agents
+        # In "async" mode all agent tasks share one event loop instead of per-agent pools
+        self.runtime = None
+        if settings.get("AGENT_RUNTIME", "threads") == "async":
+            self.runtime = AsyncAgentRuntime(self.update_queue, max_in_flight=settings.get("ASYNC_MAX_IN_FLIGHT", 256))
         self.agents = self._load_agents_from_config()
 
+    @property
+    def is_running(self):
+        return self._started and not self._shutdown.is_set()
+
     def start(self):
-        """Sets the running flag to True."""
+        """Clears the shutdown signal and starts the agent worker pools."""
         print("Supervisor starting...")
-        self.is_running = True
+        self._shutdown.clear()
+        self._started = True
+        if self.runtime:
+            self.runtime.start()
+        for pool in self.pools.values():
+            pool.start()
+        if settings.get("MEMOS_WARM_UP", False):
+            # Load the shared memory models in the background so the first recall doesn't wait for them
+            memos_client.warm_up()
 
     def stop(self):
-        """Sets the running flag to False to gracefully stop the loop."""
+        """Signals the main loop to exit and wakes it up if it is waiting for a command."""
         print("Supervisor stopping...")
-        self.is_running = False
+        self._shutdown.set()
+        self.command_queue.put(SHUTDOWN)
+        if self.runtime:
+            self.runtime.stop(wait=False)
+        for pool in self.pools.values():
+            pool.shutdown(wait=False)
 
     def run_in_background(self):
         """The main loop for the supervisor, intended to be run in a separate thread."""
-        self.start()  # Set the running flag to true when the loop starts
-        while self.is_running:
+        self.start()
+        while not self._shutdown.is_set():
+            # Block until a command (or the shutdown signal) arrives instead of polling
+            command = self.command_queue.get()
+            if command is SHUTDOWN:
+                break
             try:
-                if not self.command_queue.empty():
-                    command = self.command_queue.get()
-                    print(f"Supervisor received command: {command}")
-
-                    # A simple, hard-coded command handler
-                    if command == "list_tools":
-                        response = "--- Available Agents & Tools ---\n"
-                        if not self.agents:
-                            response += "No agents have been loaded."
-                        else:
-                            for agent_name, agent_instance in self.agents.items():
-                                response += f"\n[Agent] {agent_name}\n"
-                                tool_names = list(agent_instance.tools.keys())
-                                if tool_names:
-                                    response += "  Tools: " + ", ".join(tool_names) + "\n"
-                                else:
-                                    response += "  Tools: None\n"
-
-                        # Send the formatted response back to the GUI
-                        self.update_queue.put(response)
-
-                    else:
-                        # --- Pass the command to an agent ---
-                        if not self.agents:
-                            self.update_queue.put("No agents available to handle the command.")
-                        else:
-                            # For now, just pick the first agent in the list
-                            # In the future, we could have a routing agent
-                            agent_to_use = list(self.agents.values())[0]
-
-                            # Run the agent's task logic in a separate thread so it doesn't block the supervisor
-                            agent_thread = Thread(target=agent_to_use.run_task, args=(command,))
-                            agent_thread.start()
-
-                            self.update_queue.put(f"Task '{command}' dispatched to agent '{agent_to_use.name}'.")
-                time.sleep(0.1)  # Prevents the loop from using 100% CPU
-
+                self._handle_command(command)
             except Exception as e:
                 print(f"[SUPERVISOR_ERROR] {e}")
 
         print("Supervisor background loop has terminated.")
 
+    def _handle_command(self, command):
+        print(f"Supervisor received command: {command}")
+
+        # A simple, hard-coded command handler
+        if command == "list_tools":
+            response = "--- Available Agents & Tools ---\n"
+            if not self.agents:
+                response += "No agents have been loaded."
+            else:
+                for agent_name, agent_instance in self.agents.items():
+                    response += f"\n[Agent] {agent_name}\n"
+                    pool = self.pools.get(agent_name)
+                    if pool:
+                        response += (f"  Status: {agent_instance.status}, queue depth "
+                                     f"{pool.queue_depth}/{pool.max_pending}, workers {pool.max_workers}\n")
+                    else:
+                        response += (f"  Status: {agent_instance.status}, runtime tasks in flight "
+                                     f"{self.runtime.in_flight}/{self.runtime.max_in_flight}\n")
+                    tool_names = list(agent_instance.tools.keys())
+                    if tool_names:
+                        response += "  Tools: " + ", ".join(tool_names) + "\n"
+                    else:
+                        response += "  Tools: None\n"
+
+            # Send the formatted response back to the GUI
+            self.update_queue.put(response)
+
+        else:
+            # --- Pass the command to an agent ---
+            if not self.agents:
+                self.update_queue.put("No agents available to handle the command.")
+            else:
+                # For now, just pick the first agent in the list
+                # In the future, we could have a routing agent
+                agent_to_use = list(self.agents.values())[0]
+
+                # Hand the task to the event loop or the agent's worker pool so it doesn't block the supervisor
+                if self.runtime:
+                    accepted = self.runtime.submit(agent_to_use, command)
+                else:
+                    accepted = self.pools[agent_to_use.name].submit(command)
+                if accepted:
+                    self.update_queue.put(f"Task '{command}' dispatched to agent '{agent_to_use.name}'.")
+
     def _load_agents_from_config(self):
         """Loads agent configurations and instantiates agent objects."""
-        # For now, we assume the config file is in the root directory.
-        config_path = 'jaraxxus_config.json'
+        config_path = self.config_path
         try:
             with open(config_path, 'r') as f:
                 agent_config = json.load(f)
@@ -103,4 +145,72 @@ class JaraxxusSupervisor:
                 )
                 loaded_agents[agent_name] = agent_instance
 
+                # In thread mode each agent gets its own bounded worker pool
+                if self.runtime is None:
+                    self.pools[agent_name] = AgentWorkerPool(
+                        agent_instance,
+                        self.update_queue,
+                        max_workers=agent_data.get("max_workers", settings.get("AGENT_MAX_WORKERS", 2)),
+                        max_pending=agent_data.get("max_pending", settings.get("AGENT_MAX_PENDING", 10)),
+                        overflow_policy=agent_data.get("overflow_policy", settings.get("AGENT_OVERFLOW_POLICY", "reject")),
+                    )
+
         return loaded_agents
+
+
+def benchmark_dispatch(num_commands=200, interval=0.005):
+    """
+    Measures the time from command_queue.put() to the moment an agent starts
+    running the task. Uses a stand-in agent so no LLM calls are made.
+    """
+    import os
+    import tempfile
+
+    class _TimingAgent:
+        def __init__(self):
+            self.name = "BenchAgent"
+            self.tools = {}
+            self.status = "idle"
+            self.started_at = {}
+            self.done = Event()
+
+        def run_task(self, task):
+            self.started_at[task] = time.perf_counter()
+            if len(self.started_at) == num_commands:
+                self.done.set()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        empty_config = os.path.join(tmp_dir, "bench_config.json")
+        with open(empty_config, "w") as f:
+            json.dump({"agents": []}, f)
+        supervisor = JaraxxusSupervisor(Queue(), Queue(), config_path=empty_config)
+
+    agent = _TimingAgent()
+    supervisor.agents = {agent.name: agent}
+    supervisor.pools = {agent.name: AgentWorkerPool(agent, supervisor.update_queue, max_workers=4,
+                                                    max_pending=num_commands)}
+    supervisor_thread = Thread(target=supervisor.run_in_background, daemon=True)
+    supervisor_thread.start()
+
+    put_at = {}
+    for i in range(num_commands):
+        task = f"bench-task-{i}"
+        put_at[task] = time.perf_counter()
+        supervisor.command_queue.put(task)
+        time.sleep(interval)  # Spaced out so we measure dispatch latency, not queueing
+
+    agent.done.wait(timeout=30)
+    supervisor.stop()
+    supervisor_thread.join(timeout=5)
+
+    latencies = sorted((agent.started_at[t] - put_at[t]) * 1000 for t in agent.started_at)
+    if not latencies:
+        print("No tasks were started.")
+        return
+    print(f"Dispatch latency over {len(latencies)} commands (command_queue.put -> agent start):")
+    print(f"  min {latencies[0]:.3f} ms | median {latencies[len(latencies) // 2]:.3f} ms | "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.3f} ms | max {latencies[-1]:.3f} ms")
+
+
+if __name__ == '__main__':
+    benchmark_dispatch()
@@ -1,27 +1,26 @@
 # tools/__init__.py
-import importlib
-import pkgutil
+import os
+from core.app_config import settings
+from ._registry import ToolRegistry
 
-# The master dictionary that will hold all discovered tool functions
-AVAILABLE_TOOLS = {}
+# Tools are registered lazily by default: only their DESCRIPTION/ARGS_SCHEMA are
+# read at startup and the module itself is imported on first use. Set
+# JARAXXUS_EAGER_TOOLS=1 (or LAZY_TOOL_LOADING=False) to import everything up front.
+LAZY_LOADING = os.getenv("JARAXXUS_EAGER_TOOLS", "0") != "1" and settings.get("LAZY_TOOL_LOADING", True)
 
 print("Initializing tool discovery...")
 
-# Iterate over all modules in the 'tools' package
-for finder, name, ispkg in pkgutil.iter_modules(__path__, __name__ + "."):
-    if not ispkg:  # Ensure we are not importing a sub-package
-        try:
-            # Import the module (e.g., tools.run_command)
-            module = importlib.import_module(name)
+registry = ToolRegistry(__path__, __name__, lazy=LAZY_LOADING)
 
-            # We expect each tool module to have a 'run' function
-            if hasattr(module, 'run') and callable(getattr(module, 'run')):
-                # The tool's key is its module name (e.g., "run_command")
-                tool_name = name.split('.')[-1]
-                AVAILABLE_TOOLS[tool_name] = module
-                print(f"  > Discovered tool: '{tool_name}'")
-
-        except Exception as e:
-            print(f"  > Failed to load tool from {name}: {e}")
+# The master dictionary that will hold all discovered tools
+AVAILABLE_TOOLS = registry.refresh()
 
 print(f"Tool discovery complete. Loaded: {list(AVAILABLE_TOOLS.keys())}")
+
+
+def load_tools():
+    """
+    Re-scans the tools directory and returns the tool dictionary. Only files
+    that changed since the last scan are re-parsed or re-imported.
+    """
+    return registry.refresh()
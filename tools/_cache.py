@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+from core.app_config import settings
+
+# In-process memo of file digests, keyed by (path, mtime_ns, size), so a file
+# is only hashed again after it changes.
+_digest_memo = {}
+_digest_lock = Lock()
+
+
+def cache_dir(*parts):
+    """Returns (and creates) a directory under the shared Jaraxxus cache directory."""
+    path = os.path.join(settings.get("CACHE_DIR", ".jaraxxus_cache"), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_digest(file_path):
+    """SHA-256 of a file's contents, memoized until the file's mtime or size changes."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    digest = sha.hexdigest()
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def make_key(kind, digest, **params):
+    """Builds a cache key from a result kind, a content digest and extraction parameters."""
+    return f"{kind}:{digest}:{json.dumps(params, sort_keys=True)}"
+
+
+class ExtractionCache:
+    """
+    Disk-backed cache for extraction results (page texts, OCR output, PDF metadata).
+
+    Entries are keyed by the source file's content hash plus the parameters
+    that affect the result, so renaming or copying a file still hits and editing
+    it misses. Entries are stored in SQLite; when the total size exceeds
+    `max_bytes` the least recently used entries are evicted.
+    """
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+        self._conn.commit()
+        # Running estimate of the cache size; recomputed exactly before evicting
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key):
+        """Returns the cached value for key, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, value):
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        # Other processes may share the database, so start from the real total
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            self._total_bytes = total
+            return
+        # Drop least recently used entries until we are comfortably under the limit
+        target = self.max_bytes * 0.9
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+        self._total_bytes = total
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+_cache = None
+_cache_lock = Lock()
+
+
+def get_extraction_cache():
+    """Returns the process-wide extraction cache, or None if caching is disabled."""
+    global _cache
+    if not settings.get("EXTRACTION_CACHE", True):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache(
+                os.path.join(cache_dir(), "extraction.sqlite3"),
+                max_bytes=int(settings.get("EXTRACTION_CACHE_MAX_MB", 512)) * 1024 * 1024,
+            )
+    return _cache
@@ -1,5 +1,31 @@
+import os
 import json
 import ast
+import multiprocessing
+from contextvars import ContextVar
+
+# Set by the agent around a tool call; long-running tools pass partial output
+# to it so the GUI can show progress. Context-local, so concurrent tasks (and
+# the worker threads they start through asyncio.to_thread) each see their own.
+progress_hook = ContextVar("progress_hook", default=None)
+
+
+def report_progress(message):
+    """Forwards a progress message to the calling agent, if it listens for progress."""
+    hook = progress_hook.get()
+    if hook is not None:
+        hook(message)
+
+def process_pool_context():
+    """
+    Start method for tool process pools. The app forks from a process full of
+    threads (GUI, supervisor, agent workers, event loop), and a forked child
+    can deadlock on a lock one of them held; forkserver and spawn start clean.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
 
 def parse_input(action_input):
     """
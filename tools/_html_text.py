@@ -0,0 +1,164 @@
+import codecs
+import re
+from html.parser import HTMLParser
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Elements whose content is never useful page text
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "nav", "footer",
+             "aside", "form", "button", "select"}
+# Dropped only outside the main content, so article titles are kept
+PAGE_CHROME_TAGS = {"header"}
+# Elements that start a new line of output
+BLOCK_TAGS = {"address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "h1", "h2",
+              "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section", "table", "td", "th",
+              "tr", "ul"}
+MAIN_TAGS = {"main", "article"}
+
+_WHITESPACE = re.compile(r"\s+")
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+def decode_html(body, content_type=""):
+    """Decodes an HTML body using the Content-Type charset, then a <meta> charset, then UTF-8."""
+    candidates = []
+    match = re.search(r"charset=([\w-]+)", content_type or "", re.IGNORECASE)
+    if match:
+        candidates.append(match.group(1))
+    match = _META_CHARSET.search(body[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for charset in candidates:
+        try:
+            codecs.lookup(charset)
+            return body.decode(charset, errors="replace")
+        except LookupError:
+            continue
+    return body.decode("utf-8", errors="replace")
+
+
+def _finish(parts, max_chars):
+    """Joins collected text fragments into non-empty, whitespace-normalized lines, cut at max_chars."""
+    lines = (line.strip() for line in "".join(parts).split("\n"))
+    text = "\n".join(line for line in lines if line)
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars].rstrip() + "\n[... truncated]"
+    return text
+
+
+class _TextExtractor(HTMLParser):
+    """
+    Single-pass text extractor on the standard library parser. Text inside
+    boilerplate elements is dropped as it streams past; text inside <main> or
+    <article> is also collected separately so it can be preferred over the
+    whole page. Only non-whitespace text counts toward either buffer, so an
+    empty <main> does not hide the page text. Parsing stops early only once
+    both buffers hold max_chars; a page without <main> or <article> is
+    parsed to the end, since such an element could still follow.
+    """
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.page_parts, self.page_chars = [], 0
+        self.main_parts, self.main_chars = [], 0
+        self._skip_depth = 0
+        self._main_depth = 0
+
+    @property
+    def done(self):
+        return bool(self.max_chars) and min(self.page_chars, self.main_chars) >= self.max_chars
+
+    def _skips(self, tag):
+        return tag in SKIP_TAGS or (tag in PAGE_CHROME_TAGS and not self._main_depth)
+
+    def _append(self, text):
+        chars = len(text.strip())
+        if not self.max_chars or self.page_chars < self.max_chars:
+            self.page_parts.append(text)
+            self.page_chars += chars
+        if self._main_depth and (not self.max_chars or self.main_chars < self.max_chars):
+            self.main_parts.append(text)
+            self.main_chars += chars
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_depth or self._skips(tag):
+            if tag in SKIP_TAGS or tag in PAGE_CHROME_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in MAIN_TAGS:
+            self._main_depth += 1
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if not self._skip_depth and tag in BLOCK_TAGS:
+            self._append("\n")
+
+    def handle_endtag(self, tag):
+        if self._skip_depth:
+            if tag in SKIP_TAGS or tag in PAGE_CHROME_TAGS:
+                self._skip_depth -= 1
+            return
+        if tag in BLOCK_TAGS:
+            self._append("\n")
+        if tag in MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._append(_WHITESPACE.sub(" ", data))
+
+
+def _extract_stdlib(html, max_chars, chunk_size=65536):
+    parser = _TextExtractor(max_chars)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.done:
+            break
+    parts = parser.main_parts if parser.main_chars else parser.page_parts
+    return _finish(parts, max_chars)
+
+
+def _extract_lxml(html, max_chars):
+    doc = lxml.html.document_fromstring(html)
+    root = next((el for el in doc.iter(*MAIN_TAGS) if el.text_content().strip()), None)
+    drop = SKIP_TAGS if root is not None else SKIP_TAGS | PAGE_CHROME_TAGS
+    if root is None:
+        root = doc.find("body")
+        root = root if root is not None else doc
+    etree.strip_elements(root, *drop, with_tail=False)
+
+    parts, chars = [], 0
+    for event, el in etree.iterwalk(root, events=("start", "end")):
+        tag = el.tag if isinstance(el.tag, str) else None # Comments and processing instructions
+        if event == "start":
+            pieces = ["\n" if tag in BLOCK_TAGS else "", el.text if tag and el.text else ""]
+        else:
+            pieces = ["\n" if tag in BLOCK_TAGS else "", el.tail if el is not root and el.tail else ""]
+        for piece in pieces:
+            if piece:
+                piece = _WHITESPACE.sub(" ", piece) if piece != "\n" else piece
+                parts.append(piece)
+                chars += len(piece)
+        if max_chars and chars >= max_chars:
+            break
+    return _finish(parts, max_chars)
+
+
+def html_to_text(html, max_chars=None):
+    """
+    Returns the readable text of an HTML document: the <main>/<article> content
+    if the page has any, otherwise the whole body, without scripts, styles,
+    navigation, headers, footers and forms. Block elements become line breaks.
+    Uses lxml when installed, else the standard library parser. The result is
+    cut to max_chars.
+    """
+    if lxml is not None:
+        try:
+            return _extract_lxml(html, max_chars)
+        except (ValueError, etree.ParserError):
+            pass # e.g. an empty document or a str with an XML encoding declaration
+    return _extract_stdlib(html, max_chars)
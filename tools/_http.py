@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from core.app_config import settings
+from ._cache import cache_dir
+
+USER_AGENT = "JaraxxusAgent/1.0 (AI Assistant)"
+
+_session = None
+_session_lock = Lock()
+
+
+def get_session():
+    """
+    Returns the process-wide requests session. Connections are kept alive and
+    reused per host; each host gets at most HTTP_MAX_CONN_PER_HOST connections
+    and callers beyond that wait for a free one.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.get("HTTP_POOL_HOSTS", 16),
+                pool_maxsize=settings.get("HTTP_MAX_CONN_PER_HOST", 4),
+                pool_block=True,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+    return _session
+
+
+class HostRateLimiter:
+    """
+    Spaces out network requests to the same host by at least `min_interval`
+    seconds. Callers reserve the next free slot under the lock and sleep
+    outside it, so concurrent fetches to one host queue up in arrival order
+    while fetches to other hosts are not delayed.
+    """
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = Lock()
+
+    def wait(self, host):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+host_limiter = HostRateLimiter(settings.get("HTTP_HOST_MIN_INTERVAL", 0.1))
+
+
+def _freshness_lifetime(headers):
+    """Seconds the response may be served without revalidation, or None if it must not be stored."""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match:
+        return int(match.group(1))
+    if headers.get("Expires"):
+        try:
+            return max(0, parsedate_to_datetime(headers["Expires"]).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0
+    return settings.get("HTTP_CACHE_DEFAULT_TTL", 300)
+
+
+class HttpCache:
+    """
+    On-disk cache of GET responses that honours Cache-Control, Expires, ETag and
+    Last-Modified. Fresh entries are served without touching the network; stale
+    ones are revalidated with a conditional request. Entries unused for longer
+    than `max_age` seconds are deleted by evict().
+    """
+    def __init__(self, directory, max_age):
+        self.directory = directory
+        self.max_age = max_age
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _paths(self, url):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, name)
+        return base + ".json", base + ".body"
+
+    def load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def store(self, url, response, body):
+        lifetime = _freshness_lifetime(response.headers)
+        if lifetime is None:
+            return
+        meta = {
+            "url": url,
+            "stored_at": time.time(),
+            "expires_at": time.time() + lifetime,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type", ""),
+        }
+        meta_path, body_path = self._paths(url)
+        self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def refresh(self, url, meta, response):
+        """Records a successful revalidation (304): the cached body is fresh again."""
+        lifetime = _freshness_lifetime(response.headers)
+        if lifetime is None:
+            return
+        meta = dict(meta, stored_at=time.time(), expires_at=time.time() + lifetime)
+        meta["etag"] = response.headers.get("ETag", meta.get("etag"))
+        self._write(self._paths(url)[0], json.dumps(meta).encode("utf-8"))
+
+    @staticmethod
+    def _write(path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Deletes entries that have not been stored or revalidated for more than max_age seconds."""
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.directory, name)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    stored_at = json.load(f).get("stored_at", 0)
+            except (OSError, ValueError):
+                stored_at = 0
+            if stored_at < cutoff:
+                for path in (meta_path, meta_path[:-5] + ".body"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+
+_http_cache = None
+
+
+def get_http_cache():
+    """Returns the process-wide HTTP cache, or None if it is disabled."""
+    global _http_cache
+    if not settings.get("HTTP_CACHE", True):
+        return None
+    with _session_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache(cache_dir("http"), max_age=settings.get("HTTP_CACHE_MAX_AGE", 86400))
+            _http_cache.evict()
+    return _http_cache
+
+
+def _read_body(resp, max_bytes):
+    """Reads a streamed response body, stopping after max_bytes. Returns (body, truncated)."""
+    if not max_bytes:
+        return resp.content, False
+    chunks, size = [], 0
+    for chunk in resp.iter_content(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            resp.close() # Don't download the rest; the connection is discarded, not reused
+            return b"".join(chunks)[:max_bytes], True
+    return b"".join(chunks), False
+
+
+def _drain(resp, limit=64 * 1024):
+    """Reads a small leftover body (304, error page) so the connection goes back to the pool instead of being closed."""
+    _read_body(resp, limit)
+
+
+def fetch(url, timeout=15, max_bytes=None):
+    """
+    GETs a URL through the pooled session and the HTTP cache.
+    Returns (body_bytes, content_type, source) where source is "cache",
+    "revalidated" or "network". The body is streamed and cut off after
+    max_bytes; truncated bodies are not cached. Raises for HTTP error statuses.
+    """
+    cache = get_http_cache()
+    meta, body = cache.load(url) if cache else (None, None)
+    if meta and time.time() < meta["expires_at"]:
+        cache.hits += 1
+        return body[:max_bytes] if max_bytes else body, meta["content_type"], "cache"
+
+    headers = {}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    host_limiter.wait(urlsplit(url).netloc) # Cache hits above never count against the host
+    resp = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+    with resp:
+        if resp.status_code == 304 and meta:
+            _drain(resp)
+            cache.revalidated += 1
+            cache.refresh(url, meta, resp)
+            return body[:max_bytes] if max_bytes else body, meta["content_type"], "revalidated"
+        if resp.status_code >= 400:
+            _drain(resp)
+        resp.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
+        content, truncated = _read_body(resp, max_bytes)
+
+    if cache:
+        cache.misses += 1
+        if not truncated:
+            cache.store(url, resp, content)
+    return content, resp.headers.get("Content-Type", ""), "network"
@@ -0,0 +1,241 @@
+# tools/_registry.py
+import ast
+import hashlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from threading import Lock
+
+# Bump when the manifest layout changes so stale manifests are ignored
+_MANIFEST_VERSION = 1
+
+
+class LazyTool:
+    """
+    Stands in for a tool module until the tool is actually used.
+
+    DESCRIPTION and ARGS_SCHEMA are read from the source file without importing
+    it, so building prompts never pulls in a tool's heavy dependencies. The
+    real module is imported on the first run() call (or the first access to any
+    other module attribute).
+    """
+    def __init__(self, name, module_name, description, args_schema, reload=False):
+        self.name = name
+        self.module_name = module_name
+        self.DESCRIPTION = description
+        self.ARGS_SCHEMA = args_schema
+        self._module = None
+        self._reload = reload  # The source changed after an older version was imported
+        self._lock = Lock()
+
+    # JaraxxusAgent reads lowercase attributes from its tools
+    @property
+    def description(self):
+        return self.DESCRIPTION
+
+    @property
+    def args_schema(self):
+        return self.ARGS_SCHEMA
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        """Imports the real tool module (once) and returns it."""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    if self._reload and self.module_name in sys.modules:
+                        self._module = importlib.reload(sys.modules[self.module_name])
+                    else:
+                        self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    def run(self, action_input):
+        try:
+            module = self.load()
+        except Exception as e:
+            return f"Error: Tool '{self.name}' could not be loaded: {e}"
+        return module.run(action_input)
+
+    __call__ = run
+
+    def __getattr__(self, attr):
+        # Only called for attributes not found on the LazyTool itself
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyTool '{self.name}' ({state})>"
+
+
+def read_tool_metadata(file_path):
+    """
+    Reads DESCRIPTION, ARGS_SCHEMA and the presence of a top-level run() from a
+    tool's source with the ast module. Returns None if the file defines no run().
+    Raises ValueError if the constants are not plain literals.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=file_path)
+
+    metadata = {"DESCRIPTION": "No description.", "ARGS_SCHEMA": "{}"}
+    has_run = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "run":
+            has_run = True
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    if target.id in metadata:
+                        metadata[target.id] = ast.literal_eval(node.value)
+                    elif target.id == "run":
+                        has_run = True
+    return metadata if has_run else None
+
+
+def _import_tool(module_name, reload=False):
+    """Imports (or re-imports) a tool module, returning None if it has no callable run()."""
+    if reload and module_name in sys.modules:
+        module = importlib.reload(sys.modules[module_name])
+    else:
+        module = importlib.import_module(module_name)
+    # We expect each tool module to have a 'run' function
+    return module if callable(getattr(module, 'run', None)) else None
+
+
+def _file_digest(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class ToolRegistry:
+    """
+    Keeps the set of available tools in sync with the files in the tools package.
+
+    Tool metadata is stored in an on-disk manifest keyed by file name, together
+    with each file's mtime, size and content hash. refresh() only stats the
+    files: unchanged tools keep their existing entries (and already-imported
+    modules), while new or edited files are re-parsed and, if they were already
+    imported, reloaded. Hot-swapping a single new tool therefore costs one
+    parse, not a re-import of the whole package.
+    """
+    def __init__(self, package_path, package_name, lazy=True, manifest_path=None):
+        self.package_dir = list(package_path)[0]
+        self.package_name = package_name
+        self.lazy = lazy
+        self.manifest_path = manifest_path or os.path.join(self.package_dir, ".tool_manifest.json")
+        self.tools = {}
+        self._manifest = self._load_manifest()
+        self._lock = Lock()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            return manifest if manifest.get("version") == _MANIFEST_VERSION else {"version": _MANIFEST_VERSION, "files": {}}
+        except (OSError, ValueError):
+            return {"version": _MANIFEST_VERSION, "files": {}}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._manifest, f, indent=1)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"  > Could not write tool manifest: {e}")
+
+    def _scan_entry(self, file_path, stat, previous):
+        """Returns (entry, changed) for one file, reusing the manifest entry when the file is unchanged."""
+        if previous and previous["mtime_ns"] == stat.st_mtime_ns and previous["size"] == stat.st_size:
+            return previous, False
+
+        digest = _file_digest(file_path)
+        if previous and previous["sha1"] == digest:
+            # Touched but not modified
+            return dict(previous, mtime_ns=stat.st_mtime_ns), False
+
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest}
+        try:
+            metadata = read_tool_metadata(file_path)
+            entry["static"] = True
+            entry["has_run"] = metadata is not None
+            if metadata:
+                entry["description"] = metadata["DESCRIPTION"]
+                entry["args_schema"] = metadata["ARGS_SCHEMA"]
+        except (ValueError, SyntaxError):
+            # Metadata is computed at import time, so the module has to be imported
+            entry["static"] = False
+            entry["has_run"] = True
+        return entry, True
+
+    def refresh(self):
+        """Re-scans the package directory and returns the (updated) tool dictionary."""
+        with self._lock:
+            old_files = self._manifest["files"]
+            new_files = {}
+            manifest_changed = False
+
+            for file_name in sorted(os.listdir(self.package_dir)):
+                if not file_name.endswith(".py") or file_name.startswith("__"):
+                    continue
+                tool_name = file_name[:-3]
+                module_name = f"{self.package_name}.{tool_name}"
+                file_path = os.path.join(self.package_dir, file_name)
+                try:
+                    entry, changed = self._scan_entry(file_path, os.stat(file_path), old_files.get(file_name))
+                    new_files[file_name] = entry
+                    manifest_changed = manifest_changed or entry is not old_files.get(file_name)
+                    if not entry["has_run"]:
+                        self.tools.pop(tool_name, None)
+                        continue
+                    if not changed and tool_name in self.tools:
+                        continue  # Unchanged and already registered: nothing to do
+
+                    reload = changed and module_name in sys.modules
+                    if self.lazy and entry["static"]:
+                        tool = LazyTool(tool_name, module_name, entry["description"], entry["args_schema"],
+                                        reload=reload)
+                    else:
+                        tool = _import_tool(module_name, reload=reload)
+                    if tool:
+                        self.tools[tool_name] = tool
+                        print(f"  > Discovered tool: '{tool_name}'" + (" (reloaded)" if reload else ""))
+                except Exception as e:
+                    self.tools.pop(tool_name, None)
+                    print(f"  > Failed to load tool from {module_name}: {e}")
+
+            # Forget tools whose files were deleted
+            for file_name in set(old_files) - set(new_files):
+                manifest_changed = True
+                self.tools.pop(file_name[:-3], None)
+
+            if manifest_changed:
+                self._manifest["files"] = new_files
+                self._save_manifest()
+            return self.tools
+
+
+def benchmark_startup(runs=5):
+    """Compares the time taken by `import tools` in eager and lazy mode, each in a fresh interpreter."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for mode in ("eager", "lazy"):
+        env = dict(os.environ, JARAXXUS_EAGER_TOOLS="1" if mode == "eager" else "0")
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "import tools"], cwd=project_root, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{mode:>5}: median {timings[len(timings) // 2] * 1000:.1f} ms, best {timings[0] * 1000:.1f} ms over {runs} runs")
+
+
+if __name__ == '__main__':
+    benchmark_startup()
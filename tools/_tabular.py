@@ -0,0 +1,144 @@
+import csv
+import os
+
+# Output extensions handled by the columnar writers instead of openpyxl
+COLUMNAR_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def read_template(template_path):
+    """Returns (headers, rows) of an existing .xlsx, .csv or .parquet file; rows are lists of values."""
+    ext = os.path.splitext(template_path)[1].lower()
+    if ext == ".csv":
+        with open(template_path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            headers = next(reader, [])
+            return headers, [row for row in reader]
+    if ext in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(template_path)
+        columns = table.to_pydict()
+        return table.column_names, [list(row) for row in zip(*columns.values())]
+    from openpyxl import load_workbook
+    wb = load_workbook(template_path, read_only=True)
+    rows = [list(values) for values in wb.active.iter_rows(values_only=True)]
+    wb.close()
+    return (rows[0] if rows else []), rows[1:]
+
+
+def build_columns(headers, template_rows, rows):
+    """Lays rows out column by column: template rows first, then row dicts in header order."""
+    columns = {h: [] for h in headers}
+    for row in template_rows:
+        for h, value in zip(headers, row):
+            columns[h].append(value)
+    for row in rows:
+        for h in headers:
+            columns[h].append(row.get(h))
+    return columns
+
+
+def _parse_bool(value):
+    text = str(value).strip().lower()
+    if text in ("true", "false"):
+        return text == "true"
+    raise ValueError(value)
+
+
+def _parse_number(parse):
+    def parser(value):
+        if isinstance(value, str):
+            text = value.strip()
+            # Keep identifiers such as zip codes or "007" as text
+            if len(text) > 1 and text[0] == "0" and text[1] != ".":
+                raise ValueError(value)
+        return parse(value)
+    return parser
+
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+_PARSERS = {"bool": _parse_bool, "int": _parse_number(int), "float": _parse_number(float), "str": str}
+
+
+def infer_column_type(values):
+    """
+    Picks a single type for a whole column: "bool", "int", "float" or "str".
+    Each candidate is tried against the column once; the first that fits every
+    non-empty value wins. Integers beyond the int64 range make the column "str",
+    since a float would lose digits.
+    """
+    present = [v for v in values if v is not None and v != ""]
+    if not present:
+        return "str"
+    for kind in ("bool", "int", "float"):
+        parse = _PARSERS[kind]
+        try:
+            for v in present:
+                if kind == "int" and isinstance(v, float) and not v.is_integer():
+                    raise ValueError(v)
+                if kind != "bool" and isinstance(v, bool):
+                    raise ValueError(v)
+                parsed = parse(v)
+                if kind == "int" and not _INT64_MIN <= parsed <= _INT64_MAX:
+                    if isinstance(v, float):
+                        raise ValueError(v)
+                    return "str"
+            return kind
+        except (TypeError, ValueError):
+            continue
+    return "str"
+
+
+def convert_column(values, kind):
+    """Converts a column's values to its inferred type; empty cells become None."""
+    parse = _PARSERS[kind]
+    return [None if v is None or v == "" else parse(v) for v in values]
+
+
+def write_csv(output_path, columns):
+    headers = list(columns)
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(zip(*(columns[h] for h in headers)))
+
+
+def write_parquet(output_path, columns, types):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output requires the 'pyarrow' package (pip install pyarrow).")
+    arrow_types = {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    table = pa.table({h: pa.array(values, type=arrow_types[types[h]]) for h, values in columns.items()})
+    pq.write_table(table, output_path)
+
+
+def write_columnar(output_path, rows, headers=None, template_path=None):
+    """
+    Writes row dicts to a .csv or .parquet file via a columnar intermediate.
+    For Parquet, column types are inferred once per column and the values
+    converted to them; CSV gets the values exactly as given. With a template, its header row
+    sets the columns and its existing rows are kept, as in the .xlsx template mode.
+    Returns the number of rows written (excluding template rows).
+    """
+    fmt = COLUMNAR_FORMATS[os.path.splitext(output_path)[1].lower()]
+    template_rows = []
+    if template_path and os.path.exists(template_path):
+        template_headers, template_rows = read_template(template_path)
+        headers = headers or template_headers
+
+    rows = list(rows)
+    if not headers:
+        headers = sorted({k for row in rows for k in row})
+
+    columns = build_columns(headers, template_rows, rows)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if fmt == "csv":
+        write_csv(output_path, columns)
+    else:
+        types = {h: infer_column_type(values) for h, values in columns.items()}
+        columns = {h: convert_column(values, types[h]) for h, values in columns.items()}
+        write_parquet(output_path, columns, types)
+    return len(rows)
@@ -1,34 +1,80 @@
+import csv
+import os
+from core.app_config import settings
 from ._common import parse_input, resolve_path
+from ._cache import get_extraction_cache
 from . import extract_text_from_pdf, to_excel # Import the tool modules
 
-DESCRIPTION = "High-level tool to extract text from a PDF and immediately save it as a spreadsheet."
-ARGS_SCHEMA = '{"pdf_path": "<string: path to the source PDF>", "output_excel_path": "<string: path for the new .xlsx file>"}'
+DESCRIPTION = "High-level tool to extract text from a PDF and immediately save it as a spreadsheet. Pages are written as they are extracted, so a failure part-way through keeps the pages already done."
+ARGS_SCHEMA = '{"pdf_path": "<string: path to the source PDF>", "output_excel_path": "<string: path for the new .xlsx file (or .csv, which is flushed to disk after every page)>"}'
+
+
+class _CsvLineWriter:
+    """Writes one line of text per row to a CSV file, flushing after every page."""
+    def __init__(self, output_path):
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        self._file = open(output_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+
+    def append(self, values):
+        self._writer.writerow(values)
+
+    def end_page(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
 
 def run(action_input):
+    if not settings.get("ALLOW_FILE_CREATE", True):
+        return "Error: File creation is disabled by permissions."
+    if extract_text_from_pdf.pytesseract is None:
+        return "Error during PDF extraction step: Error: PDF processing libraries (PyPDF2, pdf2image, pytesseract) are not installed."
+
     try:
         args = parse_input(action_input)
         pdf_path = resolve_path(args.get("pdf_path", ""))
         output_path = resolve_path(args.get("output_excel_path", ""))
-        
+
         if not pdf_path or not output_path:
             return "Error: 'pdf_path' and 'output_excel_path' are required arguments."
+        if not os.path.exists(pdf_path):
+            return f"Error during PDF extraction step: Error: PDF file not found at: {pdf_path}"
+
+        # --- Pipeline: each page flows from extraction straight into the sheet writer ---
+        cache = get_extraction_cache()
+        first, last = extract_text_from_pdf.page_range(pdf_path, cache=cache)
+        if output_path.lower().endswith(".csv"):
+            writer = _CsvLineWriter(output_path)
+        else:
+            writer = to_excel.SheetWriter(output_path)
+
+        # Only the CSV writer can make a page durable before the file is closed
+        end_page = getattr(writer, "end_page", lambda: None)
+        pages_done = 0
+        lines_written = 0
+        stats = {}
+        try:
+            pages = extract_text_from_pdf.iter_pages(pdf_path, first, last, ocr_workers=settings.get("OCR_WORKERS"),
+                                                     stats=stats, cache=cache)
+            for _, page_text in pages:
+                for line in page_text.strip().splitlines():
+                    writer.append([line])
+                    lines_written += 1
+                end_page()
+                pages_done += 1
+        except Exception as e:
+            return (f"Error during PDF extraction step after {pages_done} of {last - first + 1} pages: {e}. "
+                    f"The text of the first {pages_done} pages was saved to {output_path}.")
+        finally:
+            # Also saves whatever was written when extraction fails part-way
+            writer.close()
 
-        # --- Step 1: Call the PDF extraction tool ---
-        pdf_text_input = {"pdf_path": pdf_path}
-        extracted_text = extract_text_from_pdf.run(pdf_text_input)
-
-        if isinstance(extracted_text, str) and extracted_text.startswith("Error:"):
-            return f"Error during PDF extraction step: {extracted_text}"
-
-        # --- Step 2: Call the Excel writing tool ---
-        # We'll use the simple "text" mode of the to_excel tool
-        excel_writer_input = {
-            "output_path": output_path,
-            "text": extracted_text
-        }
-        result = to_excel.run(excel_writer_input)
-        
-        return result # Forward the result from the final step
+        if not lines_written:
+            return "Error during PDF extraction step: Error: No text could be extracted from the PDF."
+        return (f"Successfully saved spreadsheet to {output_path} ({pages_done} pages, {lines_written} rows; "
+                f"{stats.get('direct', 0)} pages direct, {stats.get('ocr', 0)} pages OCR)")
 
     except Exception as e:
         return f"An error occurred in the extraction workflow: {e}"
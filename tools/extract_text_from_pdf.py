@@ -1,9 +1,12 @@
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from core.app_config import settings
-from ._common import parse_input, resolve_path
+from ._common import parse_input, resolve_path, process_pool_context
+from ._cache import get_extraction_cache, file_digest, make_key
 try:
     import pytesseract
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     from PyPDF2 import PdfReader
 
     # Set tesseract path from config
@@ -12,8 +15,227 @@ try:
 except ImportError:
     pytesseract = None
 
-DESCRIPTION = "Extracts all text from a PDF file. It first tries direct extraction, then falls back to OCR if needed."
-ARGS_SCHEMA = '{"pdf_path": "<string: path to the PDF file>", "page_limit": "<integer: optional, number of pages to process>"}'
+DESCRIPTION = "Extracts all text from a PDF file. Pages with a text layer are read directly; only scanned/image-only pages are OCRed, in parallel across CPU cores."
+ARGS_SCHEMA = '{"pdf_path": "<string: path to the PDF file>", "page_limit": "<integer: optional, number of pages to process>", "first_page": "<integer: optional, first page to process (1-based)>", "last_page": "<integer: optional, last page to process>", "ocr_workers": "<integer: optional, number of parallel OCR processes, defaults to the number of CPU cores>", "report_stats": "<boolean: optional, append how many pages were read directly vs. OCRed>", "use_cache": "<boolean: optional, reuse earlier results for the same document, default true>"}'
+
+OCR_DPI = 300
+OCR_LANG = "eng"
+OCR_CHUNK_SIZE = 4  # Pages rasterized and OCRed per worker task
+PAGE_WINDOW = 32  # Pages classified (direct vs. OCR) together by iter_pages
+LOOKAHEAD_PAGES = 256  # Classified pages iter_pages may hold ahead of the caller to keep OCR workers busy
+
+
+def _init_ocr_worker():
+    # Each worker handles its own pages; stop tesseract from also spawning a thread per core
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _ocr_page_range(pdf_path, first_page, last_page, dpi, lang):
+    """Rasterizes and OCRs pages first_page..last_page (1-based, inclusive). Runs inside worker processes."""
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page)
+    return [pytesseract.image_to_string(img, lang=lang) for img in images]
+
+
+def _page_count(pdf_path, cache=None):
+    key = cache and make_key("pdf_pages", file_digest(pdf_path))
+    cached = cache.get(key) if cache else None
+    if cached is not None:
+        return int(cached)
+    try:
+        num_pages = len(PdfReader(pdf_path).pages)
+    except Exception:
+        num_pages = pdfinfo_from_path(pdf_path)["Pages"]
+    if cache:
+        cache.put(key, str(num_pages))
+    return num_pages
+
+
+def page_range(pdf_path, first_page=None, last_page=None, page_limit=None, cache=None):
+    """Resolves the optional first_page/last_page/page_limit arguments to an inclusive 1-based range."""
+    num_pages = _page_count(pdf_path, cache)
+    first = max(1, int(first_page or 1))
+    last = min(num_pages, int(last_page or num_pages))
+    if page_limit:
+        last = min(last, first + int(page_limit) - 1)
+    return first, last
+
+
+def _iter_windows(pages, chunk_size):
+    """
+    Lazily groups ascending page numbers into runs of consecutive pages, at
+    most chunk_size long. A None from `pages` means no more pages are ready
+    yet: the current run is cut short and None is passed on.
+    """
+    window = None
+    for page in pages:
+        if page is None:
+            if window:
+                yield window
+                window = None
+            yield None
+        elif window and page == window[1] + 1 and page - window[0] < chunk_size:
+            window[1] = page
+        else:
+            if window:
+                yield window
+            window = [page, page]
+    if window:
+        yield window
+
+
+def iter_ocr_pages(pdf_path, pages, workers=None, chunk_size=OCR_CHUNK_SIZE, dpi=OCR_DPI, lang=OCR_LANG):
+    """
+    OCRs the given page numbers (1-based, ascending) and yields one string per page, in order.
+
+    `pages` may be a lazy iterable that yields None when no more pages are
+    ready yet; it is only read ahead as far as the workers need. In a single
+    process pages are rasterized one at a time, so memory stays flat no matter
+    how long the document is. With more than one worker, each window of up to
+    `chunk_size` consecutive pages is handled by its own process and only a
+    bounded number of windows are in flight at any time. The pool is started
+    with the first window, so a document that needs no OCR never starts one.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for page in pages:
+            if page is None:
+                raise RuntimeError("OCR page source stalled: a page was requested before it was queued.")
+            yield from _ocr_page_range(pdf_path, page, page, dpi, lang)
+        return
+
+    max_in_flight = workers * 2
+    windows = _iter_windows(pages, chunk_size)
+    pending = deque()
+    exhausted = False
+    pool = None
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                window = next(windows, False)
+                if window is False:
+                    exhausted = True
+                elif window is None:
+                    break # Nothing more is ready; collect what is in flight
+                else:
+                    pool = pool or ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker,
+                                                       mp_context=process_pool_context())
+                    pending.append(pool.submit(_ocr_page_range, pdf_path, window[0], window[1], dpi, lang))
+            if not pending:
+                if exhausted:
+                    return
+                raise RuntimeError("OCR page source stalled: a page was requested before it was queued.")
+            # Wait on the oldest window so pages come back in document order
+            yield from pending.popleft().result()
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+
+def ocr_pages(pdf_path, page_limit=None, workers=None, chunk_size=OCR_CHUNK_SIZE, dpi=OCR_DPI, lang=OCR_LANG,
+              first_page=None, last_page=None):
+    """OCRs a PDF and returns one string per page, in page order."""
+    first, last = page_range(pdf_path, first_page, last_page, page_limit)
+    return list(iter_ocr_pages(pdf_path, range(first, last + 1), workers=workers, chunk_size=chunk_size,
+                               dpi=dpi, lang=lang))
+
+
+def iter_pages(pdf_path, first_page, last_page, ocr_workers=None, min_text_chars=None, stats=None, cache=None,
+               window=PAGE_WINDOW):
+    """
+    Yields (page_number, text) for every page in the range, in order.
+
+    Each page keeps its directly extracted text if it has at least
+    `min_text_chars` non-whitespace characters; only the remaining (scanned or
+    image-only) pages are OCRed. Pages are classified `window` at a time, so
+    the first pages are yielded before the rest of the document is read. The
+    pages that need OCR feed one OCR stream for the whole document, which
+    classifies further windows whenever its workers need more pages, up to
+    LOOKAHEAD_PAGES classified but not yet yielded pages. When a cache is
+    given, direct and OCR text is looked up and stored per page, keyed by the
+    PDF's content hash. If `stats` is given it is filled with the number of
+    pages that took each path.
+    """
+    if min_text_chars is None:
+        min_text_chars = settings.get("OCR_MIN_TEXT_CHARS", 20)
+    stats = stats if stats is not None else {}
+    stats.update(direct=0, ocr=0, cached=0)
+    digest = file_digest(pdf_path) if cache else None
+    reader = None
+    text_layer_ok = True
+    classified = {} # page -> ("direct" | "cached" | "ocr", text); text is None until OCRed
+    ocr_queue = deque()
+    window_starts = iter(range(first_page, last_page + 1, window))
+
+    def ocr_key(page_number):
+        return make_key("pdf_ocr", digest, page=page_number, dpi=OCR_DPI, lang=OCR_LANG)
+
+    def classify_next_window():
+        nonlocal reader, text_layer_ok
+        window_first = next(window_starts, None)
+        if window_first is None:
+            return False
+        pages = range(window_first, min(window_first + window - 1, last_page) + 1)
+
+        # 1. Direct text extraction, page by page (the reader is only opened on a cache miss)
+        direct_texts = {}
+        if text_layer_ok:
+            try:
+                for page_number in pages:
+                    key = cache and make_key("pdf_text", digest, page=page_number)
+                    text = cache.get(key) if cache else None
+                    if text is None:
+                        reader = reader or PdfReader(pdf_path)
+                        text = reader.pages[page_number - 1].extract_text() or ""
+                        if cache:
+                            cache.put(key, text)
+                    if len("".join(text.split())) >= min_text_chars:
+                        direct_texts[page_number] = text
+            except Exception:
+                direct_texts = {} # Unreadable text layer: OCR everything
+                text_layer_ok = False
+
+        # 2. Queue for OCR only the pages that had no usable text and are not cached yet
+        for page_number in pages:
+            if page_number in direct_texts:
+                classified[page_number] = ("direct", direct_texts[page_number])
+                continue
+            cached = cache.get(ocr_key(page_number)) if cache else None
+            if cached is not None:
+                classified[page_number] = ("cached", cached)
+                continue
+            classified[page_number] = ("ocr", None)
+            ocr_queue.append(page_number)
+        return True
+
+    def ocr_feed():
+        while True:
+            if ocr_queue:
+                yield ocr_queue.popleft()
+            elif len(classified) >= LOOKAHEAD_PAGES:
+                yield None # Don't read further ahead until the reader catches up
+            elif not classify_next_window():
+                return
+
+    fresh_ocr = iter_ocr_pages(pdf_path, ocr_feed(), workers=ocr_workers)
+    try:
+        for page_number in range(first_page, last_page + 1):
+            while page_number not in classified and classify_next_window():
+                pass
+            kind, text = classified.pop(page_number)
+            if kind == "direct":
+                stats["direct"] += 1
+            else:
+                stats["ocr"] += 1
+                if kind == "cached":
+                    stats["cached"] += 1
+                else:
+                    text = next(fresh_ocr)
+                    if cache:
+                        cache.put(ocr_key(page_number), text)
+            yield page_number, text
+    finally:
+        fresh_ocr.close() # Shuts the OCR pool down if the caller stops early
+
 
 def run(action_input):
     if pytesseract is None:
@@ -23,33 +245,105 @@ def run(action_input):
         args = parse_input(action_input)
         pdf_path = resolve_path(args.get("pdf_path", ""))
         page_limit = args.get("page_limit") # Can be None
+        first_page = args.get("first_page")
+        last_page = args.get("last_page")
+        ocr_workers = args.get("ocr_workers") or settings.get("OCR_WORKERS")
+        report_stats = args.get("report_stats", False)
+        cache = get_extraction_cache() if args.get("use_cache", True) else None
 
         if not pdf_path:
             return "Error: 'pdf_path' argument is required."
         if not os.path.exists(pdf_path):
             return f"Error: PDF file not found at: {pdf_path}"
 
-        text_content = ""
-        # 1. Direct text extraction
-        try:
-            reader = PdfReader(pdf_path)
-            for i, page in enumerate(reader.pages):
-                if page_limit and i >= page_limit:
-                    break
-                text_content += page.extract_text() + "\f" # Use form feed as page separator
-        except Exception:
-            text_content = "" # Reset on failure
-
-        # 2. OCR Fallback
-        if not text_content.strip():
-            images = convert_from_path(pdf_path, dpi=300)
-            if page_limit:
-                images = images[:page_limit]
-            
-            for img in images:
-                text_content += pytesseract.image_to_string(img, lang="eng") + "\f"
-
-        return text_content.strip() if text_content.strip() else "Error: No text could be extracted from the PDF."
+        first, last = page_range(pdf_path, first_page, last_page, page_limit, cache=cache)
+
+        stats = {}
+        page_texts = [text for _, text in iter_pages(pdf_path, first, last, ocr_workers=ocr_workers,
+                                                     stats=stats, cache=cache)]
+        print(f"PDF extraction for {pdf_path}: {stats['direct']} pages direct, {stats['ocr']} pages OCR "
+              f"({stats['cached']} OCR pages from cache)")
+        if cache:
+            print(f"Extraction cache: {cache.stats()}")
+
+        text_content = "\f".join(page_texts).strip() # Use form feed as page separator
+        if not text_content:
+            return "Error: No text could be extracted from the PDF."
+        if report_stats:
+            text_content += (f"\n[Extraction stats: {stats['direct']} pages direct, {stats['ocr']} pages OCR, "
+                             f"{stats['cached']} OCR pages from cache]")
+        return text_content
 
     except Exception as e:
         return f"Error processing PDF: {e}"
+
+
+def _make_scanned_pdf(path, num_pages):
+    """Writes an image-only PDF with a few lines of large text per page, for benchmarking OCR."""
+    from PIL import Image, ImageDraw, ImageFont
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 48)
+    except OSError:
+        font = ImageFont.load_default()
+    pages = []
+    for i in range(num_pages):
+        img = Image.new("L", (1275, 1650), 255)  # Letter size at 150 DPI
+        draw = ImageDraw.Draw(img)
+        for line in range(12):
+            draw.text((100, 100 + line * 120), f"Page {i + 1} line {line + 1} scanned contract text", fill=0, font=font)
+        pages.append(img)
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=150)
+
+
+def benchmark_ocr(num_pages=24, workers=None):
+    """Times serial OCR against the process-pool OCR on a generated scanned PDF."""
+    import tempfile
+    import time
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "scanned.pdf")
+        _make_scanned_pdf(pdf_path, num_pages)
+        results = {}
+        for label, n in (("serial", 1), ("parallel", workers or os.cpu_count() or 1)):
+            start = time.perf_counter()
+            texts = ocr_pages(pdf_path, workers=n)
+            elapsed = time.perf_counter() - start
+            results[label] = texts
+            print(f"{label:>8} ({n} worker{'s' if n != 1 else ''}): {elapsed:.2f}s for {len(texts)} pages "
+                  f"({len(texts) / elapsed:.2f} pages/s)")
+        print("Page order preserved:", results["serial"] == results["parallel"])
+
+
+def _rss_probe(pdf_path, workers):
+    """Run in a child process: OCRs the whole PDF and prints this process's peak RSS in MB."""
+    import resource
+    for _ in iter_ocr_pages(pdf_path, range(1, _page_count(pdf_path) + 1), workers=workers):
+        pass
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def benchmark_memory(page_counts=(8, 32), workers=1):
+    """Measures peak RSS of the OCR path for documents of different lengths; it should stay flat."""
+    import subprocess
+    import sys
+    import tempfile
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_pages in page_counts:
+            pdf_path = os.path.join(tmp_dir, f"scanned_{num_pages}.pdf")
+            _make_scanned_pdf(pdf_path, num_pages)
+            out = subprocess.run(
+                [sys.executable, "-m", "tools.extract_text_from_pdf", "rss-probe", pdf_path, str(workers)],
+                cwd=project_root, capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            print(f"{num_pages:>4} pages: peak RSS {float(out):.1f} MB")
+
+
+if __name__ == '__main__':
+    import sys
+    command = sys.argv[1] if len(sys.argv) > 1 else "speed"
+    if command == "rss-probe":
+        _rss_probe(sys.argv[2], int(sys.argv[3]))
+    elif command == "memory":
+        benchmark_memory()
+    else:
+        benchmark_ocr(int(sys.argv[2]) if len(sys.argv) > 2 else 24)
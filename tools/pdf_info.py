@@ -1,6 +1,8 @@
 import os
+import json
 from core.app_config import settings
 from ._common import parse_input, resolve_path
+from ._cache import get_extraction_cache, file_digest, make_key
 from PyPDF2 import PdfReader
 
 DESCRIPTION = "Returns metadata about a PDF file, such as the number of pages and title."
@@ -16,6 +18,12 @@ def run(action_input):
         if not os.path.exists(pdf_path):
             return f"Error: PDF file not found at: {pdf_path}"
         
+        cache = get_extraction_cache()
+        key = cache and make_key("pdf_info", file_digest(pdf_path))
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            return f"PDF Info: {json.loads(cached)}"
+
         reader = PdfReader(pdf_path)
         metadata = reader.metadata
         
@@ -24,6 +32,8 @@ def run(action_input):
             "title": getattr(metadata, 'title', 'N/A'),
             "author": getattr(metadata, 'author', 'N/A'),
         }
+        if cache:
+            cache.put(key, json.dumps(info))
         return f"PDF Info: {info}"
         
     except Exception as e:
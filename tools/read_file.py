@@ -1,10 +1,162 @@
 import os
+import mmap
+import stat
 import mimetypes
+from threading import Lock
 from core.app_config import settings
 from ._common import parse_input, resolve_path
 
-DESCRIPTION = "Reads and returns the entire text content of a specified file."
-ARGS_SCHEMA = '{"file_path": "<string: The full path of the file to read>"}'
+DESCRIPTION = "Reads the text content of a specified file. Large files are returned in pages: use mode 'head'/'tail', 'start_line' + 'num_lines' or a byte 'offset' to choose the part to read; partial results start with the file's total size and line count."
+ARGS_SCHEMA = '{"file_path": "<string: The full path of the file to read>", "mode": "<string: optional, \'head\' (default) or \'tail\'>", "start_line": "<integer: optional, first line to read (1-based)>", "num_lines": "<integer: optional, number of lines to read>", "offset": "<integer: optional, byte offset to start reading at>", "max_bytes": "<integer: optional, maximum bytes to return>"}'
+
+_SCAN_CHUNK = 4 * 1024 * 1024
+
+# Line counts of files already seen, keyed by (path, mtime_ns, size)
+_line_count_memo = {}
+_memo_lock = Lock()
+
+
+def _count_newlines(mm, start, end):
+    count = 0
+    for pos in range(start, end, _SCAN_CHUNK):
+        count += mm[pos:min(pos + _SCAN_CHUNK, end)].count(b"\n")
+    return count
+
+
+def _total_lines(file_path, mm):
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _memo_lock:
+        if key in _line_count_memo:
+            return _line_count_memo[key]
+    size = len(mm)
+    lines = _count_newlines(mm, 0, size) + (1 if mm[size - 1:size] != b"\n" else 0)
+    with _memo_lock:
+        _line_count_memo[key] = lines
+    return lines
+
+
+def _line_start(mm, line_number):
+    """Byte offset where the given 1-based line starts (end of file if there are fewer lines)."""
+    remaining = line_number - 1
+    pos = 0
+    size = len(mm)
+    while remaining > 0 and pos < size:
+        chunk = mm[pos:pos + _SCAN_CHUNK]
+        newlines = chunk.count(b"\n")
+        if newlines < remaining:
+            remaining -= newlines
+            pos += len(chunk)
+            continue
+        idx = -1
+        for _ in range(remaining):
+            idx = chunk.find(b"\n", idx + 1)
+        return pos + idx + 1
+    return min(pos, size)
+
+
+def _tail_start(mm, num_lines, max_bytes):
+    """Byte offset of the first of the last num_lines lines, no further back than max_bytes."""
+    size = len(mm)
+    floor = max(0, size - max_bytes)
+    pos = size - 1 if mm[size - 1:size] == b"\n" else size
+    for _ in range(num_lines or size):
+        pos = mm.rfind(b"\n", floor, pos)
+        if pos == -1:
+            break
+    if pos != -1:
+        return pos + 1
+    if floor == 0:
+        return 0
+    # Cut by max_bytes: start on the first whole line inside the window
+    newline = mm.find(b"\n", floor, size)
+    return newline + 1 if newline != -1 and newline + 1 < size else floor
+
+
+def _window_end(mm, start, num_lines, max_bytes):
+    """End offset (exclusive) of a window from start: num_lines lines, at most max_bytes, ending on a line break if possible."""
+    size = len(mm)
+    limit = min(size, start + max_bytes)
+    if num_lines:
+        pos = start
+        for _ in range(num_lines):
+            newline = mm.find(b"\n", pos, limit)
+            if newline == -1:
+                break
+            pos = newline + 1
+        else:
+            return pos
+    if limit == size:
+        return size
+    newline = mm.rfind(b"\n", start, limit)
+    return newline + 1 if newline != -1 else limit
+
+
+def _read_stream(file_path, mode, start_line, num_lines, offset, max_bytes):
+    """
+    Reads pipes and pseudo-files (/proc, /sys), which report a size of 0 and
+    can't be mapped: at most max_bytes from the start (or from offset), then
+    the requested lines of that window.
+    """
+    with open(file_path, "rb") as f:
+        skip = max(0, int(offset or 0))
+        while skip > 0:
+            skipped = f.read(min(skip, _SCAN_CHUNK))
+            if not skipped:
+                break
+            skip -= len(skipped)
+        data = f.read(max_bytes + 1)
+    truncated = len(data) > max_bytes
+    lines = data[:max_bytes].decode("utf-8", errors="ignore").splitlines(keepends=True)
+    if mode == "tail":
+        lines = lines[-num_lines:] if num_lines else lines
+    else:
+        first = max(1, int(start_line)) - 1 if start_line and offset is None else 0
+        if first and first >= len(lines) and not truncated:
+            return "", {"size": None, "streamed": True, "past_end": True, "total_lines": len(lines)}
+        lines = lines[first:first + num_lines] if num_lines else lines[first:]
+    return "".join(lines), {"size": None, "streamed": True, "partial": False, "truncated": truncated}
+
+
+def read_range(file_path, mode="head", start_line=None, num_lines=None, offset=None, max_bytes=None):
+    """
+    Reads part of a file through mmap, so seeking to a range does not read what
+    comes before it. Returns (text, info); info has size, total_lines, the
+    byte range and the line range returned, and whether the read was partial.
+    """
+    max_bytes = int(max_bytes or settings.get("READ_FILE_MAX_BYTES", 65536))
+    num_lines = int(num_lines) if num_lines else None
+    st = os.stat(file_path)
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        # Only real, non-empty files are mapped; empty files read as "" here too
+        return _read_stream(file_path, mode, start_line, num_lines, offset, max_bytes)
+    size = st.st_size
+
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mode == "tail":
+            start = _tail_start(mm, num_lines, max_bytes)
+            end = size
+        else:
+            if offset is not None:
+                start = min(max(0, int(offset)), size)
+            elif start_line:
+                start = _line_start(mm, max(1, int(start_line)))
+                if start == size:
+                    return "", {"size": size, "past_end": True, "total_lines": _total_lines(file_path, mm)}
+            else:
+                start = 0
+            end = _window_end(mm, start, num_lines, max_bytes)
+
+        text = mm[start:end].decode("utf-8", errors="ignore")
+        partial = start > 0 or end < size
+        info = {"size": size, "start": start, "end": end, "partial": partial}
+        if partial:
+            info["total_lines"] = _total_lines(file_path, mm)
+            info["first_line"] = _count_newlines(mm, 0, start) + 1
+            shown = text.count("\n") + (0 if not text or text.endswith("\n") else 1)
+            info["last_line"] = info["first_line"] + max(shown, 1) - 1
+    return text, info
+
 
 def run(action_input):
     try:
@@ -13,7 +165,7 @@ def run(action_input):
 
         if not file_path:
             return "Error: 'file_path' argument is required."
-            
+
         if not os.path.exists(file_path):
             return f"Error: File not found at path: {file_path}"
 
@@ -22,7 +174,27 @@ def run(action_input):
         if mime_type and not mime_type.startswith("text"):
             return f"Error: Cannot read binary file. Mime type detected: {mime_type}"
 
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+        mode = args.get("mode", "head")
+        if mode not in ("head", "tail"):
+            return "Error: 'mode' must be 'head' or 'tail'."
+
+        text, info = read_range(file_path, mode=mode, start_line=args.get("start_line"),
+                                num_lines=args.get("num_lines"), offset=args.get("offset"),
+                                max_bytes=args.get("max_bytes"))
+        if info.get("past_end"):
+            return f"Error: start_line {int(args['start_line']):,} is past end of file ({info['total_lines']:,} lines)."
+        if info.get("streamed"):
+            if info["truncated"]:
+                text += f"\n[Output cut at {len(text.encode('utf-8')):,} bytes; use offset to read further.]"
+            return text
+        if not info["partial"]:
+            return text
+
+        # Tell the agent where it is in the file so it can ask for the next page
+        header = (f"[{file_path}: {info['size']:,} bytes, {info['total_lines']:,} lines. "
+                  f"Showing lines {info['first_line']:,}-{info['last_line']:,} "
+                  f"(bytes {info['start']:,}-{info['end']:,}). "
+                  f"Use start_line/num_lines, offset or mode='tail' to read other parts.]\n")
+        return header + text
     except Exception as e:
         return f"Error reading file: {e}"
@@ -1,10 +1,156 @@
+import os
+import signal
 import subprocess
 import shlex
+import time
+from collections import deque
+from contextvars import copy_context
+from threading import Lock, Thread
 from core.app_config import settings
-from ._common import parse_input
+from ._common import parse_input, report_progress
+
+DESCRIPTION = "Executes a shell command and returns its output. Essential for file system navigation (e.g., 'ls -R') and other system interactions. Commands are killed after a timeout; very long output is trimmed to its beginning and end."
+ARGS_SCHEMA = '{"command": "<string: The full shell command to execute, e.g., \'ls -l /path/to/dir\'>", "timeout": "<number: optional, seconds before the command is killed>", "max_output_chars": "<integer: optional, characters of output kept per stream (head and tail)>"}'
+
+KILL_GRACE_SECONDS = 2 # Between SIGTERM and SIGKILL when a command times out
+PROGRESS_INTERVAL = 0.5 # Minimum seconds between progress updates
+PROGRESS_MAX_LINES = 20 # Lines per progress update; the rest are only counted
+
+
+class CappedOutput:
+    """
+    Collects a stream's lines keeping only the first and last `max_chars / 2`
+    characters, so memory is bounded however much a command prints.
+    """
+    def __init__(self, max_chars):
+        self.head_limit = max_chars // 2
+        self.tail_limit = max_chars - self.head_limit
+        self.head, self.head_chars = [], 0
+        self.tail, self.tail_chars = deque(), 0
+        self.omitted_lines = 0
+
+    def add(self, line):
+        if self.head_chars + len(line) <= self.head_limit and not self.tail:
+            self.head.append(line)
+            self.head_chars += len(line)
+            return
+        self.tail.append(line)
+        self.tail_chars += len(line)
+        while self.tail_chars > self.tail_limit and len(self.tail) > 1:
+            self.tail_chars -= len(self.tail.popleft())
+            self.omitted_lines += 1
+
+    def text(self):
+        parts = ["".join(self.head)]
+        if self.omitted_lines:
+            parts.append(f"[... {self.omitted_lines} lines omitted ...]\n")
+        parts.append("".join(self.tail))
+        return "".join(parts).strip()
+
+
+class _ProgressForwarder:
+    """Batches output lines from both pipes into rate-limited progress updates."""
+    def __init__(self):
+        # The reader threads don't inherit the caller's context (and its progress
+        # hook), so updates are sent from a copy of it, one thread at a time
+        self._context = copy_context()
+        self._lock = Lock()
+        self._pending = []
+        self._skipped = 0
+        self._last_sent = 0.0
+
+    def add(self, line):
+        with self._lock:
+            if len(self._pending) < PROGRESS_MAX_LINES:
+                self._pending.append(line.rstrip("\n"))
+            else:
+                self._skipped += 1
+            if time.monotonic() - self._last_sent >= PROGRESS_INTERVAL:
+                self._send_locked()
+
+    def flush(self):
+        with self._lock:
+            self._send_locked()
+
+    def _send_locked(self):
+        if not self._pending:
+            return
+        message = "\n".join(self._pending)
+        if self._skipped:
+            message += f"\n[... {self._skipped} more lines]"
+        self._pending, self._skipped = [], 0
+        self._last_sent = time.monotonic()
+        self._context.run(report_progress, message)
+
+
+def _pump(pipe, output, progress):
+    # Bounded readline so a huge line without newlines can't grow memory unchecked
+    for line in iter(lambda: pipe.readline(64 * 1024), ""):
+        output.add(line)
+        progress.add(line)
+    pipe.close()
+
+
+def _kill_process_group(proc):
+    """SIGTERM the command and everything it started, then SIGKILL whatever is left."""
+    if not hasattr(os, "killpg"):
+        proc.kill()
+        return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=KILL_GRACE_SECONDS)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def run_streaming(cmd_list, timeout=None, max_output_chars=None):
+    """
+    Runs a command without a shell, streaming stdout and stderr line by line.
+    Lines are forwarded to the agent's progress hook as they arrive and kept in
+    head/tail-capped buffers. The command runs in its own process group, which
+    is killed when `timeout` seconds of wall-clock time have passed.
+    Returns (returncode, stdout, stderr, timed_out).
+    """
+    timeout = timeout or settings.get("COMMAND_TIMEOUT", 300)
+    max_output_chars = max_output_chars or settings.get("COMMAND_MAX_OUTPUT_CHARS", 20000)
+    proc = subprocess.Popen(
+        cmd_list,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        start_new_session=True, # Own process group, so a timeout also kills child processes
+    )
+    stdout, stderr = CappedOutput(max_output_chars), CappedOutput(max_output_chars)
+    progress = _ProgressForwarder()
+    readers = [Thread(target=_pump, args=(proc.stdout, stdout, progress), daemon=True),
+               Thread(target=_pump, args=(proc.stderr, stderr, progress), daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_process_group(proc)
+    finally:
+        if proc.poll() is None: # Interrupted some other way; don't leave the command behind
+            _kill_process_group(proc)
+
+    for reader in readers:
+        # A detached grandchild may still hold the pipe open; don't wait on it forever
+        reader.join(timeout=KILL_GRACE_SECONDS)
+    progress.flush()
+    return proc.returncode, stdout.text(), stderr.text(), timed_out
 
-DESCRIPTION = "Executes a shell command and returns its output. Essential for file system navigation (e.g., 'ls -R') and other system interactions."
-ARGS_SCHEMA = '{"command": "<string: The full shell command to execute, e.g., \'ls -l /path/to/dir\'>"}'
 
 def run(action_input):
     """
@@ -31,20 +177,16 @@ def run(action_input):
             return "Error: Sudo (superuser) execution is disabled by permissions."
 
         # --- Execute ---
-        result = subprocess.run(
-            cmd_list,
-            capture_output=True,
-            text=True,
-            check=False,  # Don't automatically raise error, we'll format it
-            encoding='utf-8'
-        )
-        
-        output = result.stdout.strip() if result.stdout else ""
-        error = result.stderr.strip() if result.stderr else ""
-
-        if result.returncode != 0:
-            return f"Error: Command failed with exit code {result.returncode}.\nSTDOUT:\n{output}\nSTDERR:\n{error}".strip()
-        
+        timeout = args.get("timeout") or settings.get("COMMAND_TIMEOUT", 300)
+        returncode, output, error, timed_out = run_streaming(
+            cmd_list, timeout=timeout, max_output_chars=args.get("max_output_chars"))
+
+        if timed_out:
+            return f"Error: Command timed out after {timeout}s and was killed.\nSTDOUT:\n{output}\nSTDERR:\n{error}".strip()
+
+        if returncode != 0:
+            return f"Error: Command failed with exit code {returncode}.\nSTDOUT:\n{output}\nSTDERR:\n{error}".strip()
+
         # On success, return stdout, and stderr if it exists
         return (output + "\n" + error).strip() if error else output
 
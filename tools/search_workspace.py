@@ -0,0 +1,350 @@
+import fnmatch
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from threading import Lock
+from core.app_config import settings
+from ._common import parse_input, resolve_path
+from ._cache import cache_dir
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+DESCRIPTION = "Searches the text files under a directory for a substring or regular expression and returns matching lines as 'path:line: text'. Backed by an on-disk index that is updated incrementally, so it is much faster than listing and reading files one by one. The index is refreshed at most every few seconds, so a file changed a moment ago may not be found yet."
+ARGS_SCHEMA = '{"query": "<string: text or regular expression to search for>", "regex": "<boolean: optional, treat query as a regular expression, default false>", "case_sensitive": "<boolean: optional, default false>", "path": "<string: optional, directory to search, defaults to the current working directory>", "file_glob": "<string: optional, only search files whose path matches, e.g. \'*.py\'>", "max_results": "<integer: optional, maximum number of matching lines, default 100>"}'
+
+# Same exclusions as create_context.sh, plus VCS metadata and our own cache
+DEFAULT_IGNORE_PATTERNS = [".git", ".venv", "__pycache__", "*.pyc", "jaraxxus_chroma_db", ".jaraxxus_cache"]
+MAX_LINE_CHARS = 200 # Matching lines are cut to this length in results
+
+
+def _required_literals(parsed):
+    """
+    Returns the literal strings every match of a parsed regex must contain,
+    from its top-level sequence (and the groups inside it). Alternations,
+    character classes and optional parts end a literal run.
+    """
+    runs, current = [], []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        runs.append("".join(current))
+        current = []
+        if op is sre_parse.SUBPATTERN:
+            runs.extend(_required_literals(av[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            runs.extend(_required_literals(av[2]))
+    runs.append("".join(current))
+    return [run for run in runs if run]
+
+
+def query_literals(query, regex=False):
+    """Substrings a file must contain to possibly match the query; empty if the query can't narrow the search."""
+    if not regex:
+        return [query]
+    try:
+        return _required_literals(sre_parse.parse(query))
+    except (re.error, TypeError, ValueError):
+        return []
+
+
+class WorkspaceIndex:
+    """
+    Trigram index of the text files under `root`, stored in an SQLite FTS5
+    table. A query first asks the index for files containing every literal
+    part of the pattern (a trigram lookup, case-insensitive), then scans only
+    those files line by line to confirm the match. update() re-reads only
+    files whose mtime or size changed since the last call and drops deleted ones.
+    """
+    def __init__(self, root, db_path, ignore_patterns=None, max_file_bytes=1024 * 1024):
+        self.root = os.path.abspath(root)
+        patterns = ignore_patterns or DEFAULT_IGNORE_PATTERNS
+        self._ignore = re.compile("|".join(fnmatch.translate(p) for p in patterns))
+        self.max_file_bytes = max_file_bytes
+        self._lock = Lock()
+        self._known = None # path -> (file_id, mtime_ns, size), loaded on the first update
+        self.updated_at = None # time.monotonic() of the last update()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL, indexed INTEGER NOT NULL)"
+        )
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(body, tokenize='trigram', detail='none')"
+            )
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"Workspace search needs SQLite 3.34+ with FTS5 (found {sqlite3.sqlite_version}): {e}")
+        self._conn.commit()
+
+    def _walk(self):
+        """Yields (relative_path, stat) for every file under root that is not ignored."""
+        prefix_len = len(self.root) + 1
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if self._ignore.match(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path[prefix_len:], entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+    def _read_text(self, rel_path, size):
+        """Returns the file's text, or None for binary and oversized files (recorded but not indexed)."""
+        if size > self.max_file_bytes:
+            return None
+        try:
+            with open(os.path.join(self.root, rel_path), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return None if b"\0" in data[:8192] else data.decode("utf-8", errors="ignore")
+
+    def _remove_locked(self, file_id):
+        self._conn.execute("DELETE FROM content WHERE rowid = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def update(self):
+        """Brings the index up to date with the tree. Returns counts of added, changed and removed files."""
+        with self._lock:
+            if self._known is None:
+                self._known = {path: (file_id, mtime_ns, size) for file_id, path, mtime_ns, size
+                               in self._conn.execute("SELECT id, path, mtime_ns, size FROM files")}
+            known = self._known
+            counts = {"added": 0, "changed": 0, "removed": 0}
+            seen = set()
+            for rel_path, stat in self._walk():
+                seen.add(rel_path)
+                previous = known.get(rel_path)
+                if previous and previous[1] == stat.st_mtime_ns and previous[2] == stat.st_size:
+                    continue
+                if previous:
+                    self._remove_locked(previous[0])
+                    counts["changed"] += 1
+                else:
+                    counts["added"] += 1
+
+                text = self._read_text(rel_path, stat.st_size)
+                file_id = self._conn.execute(
+                    "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+                    (rel_path, stat.st_mtime_ns, stat.st_size, text is not None),
+                ).lastrowid
+                if text is not None:
+                    self._conn.execute("INSERT INTO content (rowid, body) VALUES (?, ?)", (file_id, text))
+                known[rel_path] = (file_id, stat.st_mtime_ns, stat.st_size)
+
+            for rel_path in known.keys() - seen:
+                self._remove_locked(known.pop(rel_path)[0])
+                counts["removed"] += 1
+            self._conn.commit()
+            self.updated_at = time.monotonic()
+            return counts
+
+    def refresh(self, max_age):
+        """Runs update() unless the last one was less than max_age seconds ago. Returns whether it ran."""
+        if self.updated_at is not None and time.monotonic() - self.updated_at < max_age:
+            return False
+        self.update()
+        return True
+
+    def _candidates(self, literals):
+        if not literals:
+            return [row[0] for row in self._conn.execute("SELECT path FROM files WHERE indexed ORDER BY path")]
+        # LIKE on an FTS5 trigram column is answered from the index for literals of 3+ characters
+        # (an ESCAPE clause would disable that, so '%' and '_' stay wildcards: still a superset of the matches)
+        conditions = " AND ".join(["body LIKE ?"] * len(literals))
+        return [row[0] for row in self._conn.execute(
+            f"SELECT path FROM files WHERE id IN (SELECT rowid FROM content WHERE {conditions}) ORDER BY path",
+            [f"%{literal}%" for literal in literals],
+        )]
+
+    def search(self, query, regex=False, case_sensitive=False, file_glob=None, max_results=100):
+        """Returns (hits, candidates_scanned); hits are (path, line_number, line) tuples in path order."""
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        literals = query_literals(query, regex)
+        if not case_sensitive:
+            # LIKE folds case for ASCII only, so non-ASCII letters can't be required of a file;
+            # the ASCII runs of each literal still narrow the search
+            literals = [run for literal in literals for run in re.split(r"[^\x00-\x7f]+", literal) if run]
+        with self._lock:
+            candidates = self._candidates(literals)
+        if file_glob:
+            candidates = [p for p in candidates if fnmatch.fnmatch(p, file_glob)
+                          or fnmatch.fnmatch(os.path.basename(p), file_glob)]
+
+        hits = []
+        for rel_path in candidates:
+            try:
+                with open(os.path.join(self.root, rel_path), "r", encoding="utf-8", errors="ignore") as f:
+                    for line_number, line in enumerate(f, 1):
+                        if pattern.search(line):
+                            hits.append((rel_path, line_number, line.strip()[:MAX_LINE_CHARS]))
+                            if len(hits) >= max_results:
+                                return hits, len(candidates)
+            except OSError:
+                continue # Deleted since the last update
+        return hits, len(candidates)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_indexes = {}
+_indexes_lock = Lock()
+
+
+def get_index(root):
+    """Returns the shared index for a directory, creating its database under the cache directory."""
+    root = os.path.abspath(root)
+    with _indexes_lock:
+        if root not in _indexes:
+            name = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+            _indexes[root] = WorkspaceIndex(
+                root,
+                os.path.join(cache_dir("search"), f"{name}.sqlite3"),
+                ignore_patterns=settings.get("SEARCH_IGNORE_PATTERNS") or DEFAULT_IGNORE_PATTERNS,
+                max_file_bytes=settings.get("SEARCH_MAX_FILE_BYTES", 1024 * 1024),
+            )
+    return _indexes[root]
+
+
+def run(action_input):
+    try:
+        args = parse_input(action_input)
+        query = args.get("query", "")
+        root = resolve_path(args.get("path", "")) or os.getcwd()
+
+        if not query:
+            return "Error: 'query' argument is required."
+        if not os.path.isdir(root):
+            return f"Error: Directory not found at path: {root}"
+
+        regex = bool(args.get("regex", False))
+        if regex:
+            try:
+                re.compile(query)
+            except re.error as e:
+                return f"Error: Invalid regular expression: {e}"
+
+        index = get_index(root)
+        # Re-walking a large tree costs far more than a query, so back-to-back searches share one update
+        index.refresh(settings.get("SEARCH_UPDATE_INTERVAL", 5.0))
+        max_results = int(args.get("max_results") or 100)
+        hits, _ = index.search(query, regex=regex, case_sensitive=bool(args.get("case_sensitive", False)),
+                               file_glob=args.get("file_glob"), max_results=max_results)
+        if not hits:
+            return f"No matches for '{query}' under {root}."
+        # Show paths as the caller would pass them to read_file
+        prefix = args.get("path") or ""
+        lines = [f"{os.path.join(prefix, path)}:{line_number}: {text}" for path, line_number, text in hits]
+        if len(hits) >= max_results:
+            lines.append(f"[Stopped after {max_results} matches; narrow the query or use file_glob.]")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error searching workspace: {e}"
+
+
+def _make_tree(root, num_files, files_per_dir=100):
+    """Writes a synthetic source tree: num_files small Python-like files, plus ignored directories."""
+    import random
+    rng = random.Random(0)
+    words = ["agent", "task", "queue", "worker", "config", "result", "update", "tool", "prompt", "memory",
+             "status", "handler", "request", "response", "index", "cache", "buffer", "stream", "token", "limit"]
+    for i in range(num_files):
+        directory = os.path.join(root, f"pkg{i // (files_per_dir * 10)}", f"mod{i // files_per_dir}")
+        os.makedirs(directory, exist_ok=True)
+        lines = [f"def {rng.choice(words)}_{rng.choice(words)}_{i}_{n}(self, {rng.choice(words)}):\n"
+                 f"    return self.{rng.choice(words)}.{rng.choice(words)}({n})\n" for n in range(8)]
+        with open(os.path.join(directory, f"file_{i}.py"), "w") as f:
+            f.writelines(lines)
+    for ignored in ("__pycache__", ".venv"):
+        os.makedirs(os.path.join(root, ignored), exist_ok=True)
+        with open(os.path.join(root, ignored, "noise.py"), "w") as f:
+            f.write("def unique_needle_function(): pass\n")
+    with open(os.path.join(root, "pkg0", "needle.py"), "w") as f:
+        f.write("# marker\ndef unique_needle_function():\n    return 42\n")
+
+
+def benchmark_search(num_files=50_000):
+    """Builds the index over a synthetic tree, then times incremental updates and queries against a full scan."""
+    import shutil
+    import statistics
+    import tempfile
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        tree = os.path.join(tmp_dir, "tree")
+        start = time.perf_counter()
+        _make_tree(tree, num_files)
+        print(f"Generated {num_files:,} files in {time.perf_counter() - start:.1f}s")
+
+        db_path = os.path.join(tmp_dir, "index.sqlite3")
+        index = WorkspaceIndex(tree, db_path)
+        start = time.perf_counter()
+        counts = index.update()
+        print(f"Initial index: {time.perf_counter() - start:.1f}s {counts}, "
+              f"{os.path.getsize(db_path) / 1024 / 1024:.0f} MB")
+
+        start = time.perf_counter()
+        counts = index.update()
+        print(f"No-change update: {(time.perf_counter() - start) * 1000:.0f} ms {counts}")
+
+        touched = os.path.join(tree, "pkg1", "mod10", "file_1000.py")
+        with open(touched, "a") as f:
+            f.write("def freshly_added_marker(): pass\n")
+        start = time.perf_counter()
+        counts = index.update()
+        print(f"One-file update: {(time.perf_counter() - start) * 1000:.0f} ms {counts}")
+
+        queries = [("unique_needle_function", False), ("freshly_added_marker", False),
+                   (r"def \w+_needle_\w+\(", True), ("return self.cache.limit(7)", False)]
+        for query, regex in queries:
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                hits, scanned = index.search(query, regex=regex)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"  {query!r:>32}: {statistics.median(timings):7.1f} ms, {len(hits)} hits "
+                  f"({scanned:,} candidate files)")
+
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            index.refresh(settings.get("SEARCH_UPDATE_INTERVAL", 5.0))
+            index.search("unique_needle_function")
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"  back-to-back refresh + search (as run() does): {statistics.median(timings):7.1f} ms")
+
+        pattern = re.compile("unique_needle_function", re.IGNORECASE)
+        start = time.perf_counter()
+        found = 0
+        for rel_path, _ in index._walk():
+            with open(os.path.join(tree, rel_path), "r", encoding="utf-8", errors="ignore") as f:
+                found += sum(1 for line in f if pattern.search(line))
+        print(f"  full scan (grep-like) baseline: {(time.perf_counter() - start) * 1000:7.1f} ms, {found} hits")
+        index.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import sys
+    benchmark_search(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
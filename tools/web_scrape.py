@@ -1,33 +1,271 @@
-import requests
-from bs4 import BeautifulSoup
+import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from core.app_config import settings
 from ._common import parse_input
+from ._http import fetch
+from ._html_text import decode_html, html_to_text, _finish
+
+DESCRIPTION = "Fetches the main text content of a given URL, without navigation, scripts or other page boilerplate; long pages are truncated. Pass 'urls' to fetch several pages concurrently in one step; the result is then a JSON object mapping each URL to its text or error."
+ARGS_SCHEMA = '{"url": "<string: The full URL to scrape>", "urls": "[<string>: optional, several URLs to scrape concurrently instead of \'url\']", "timeout": "<number: optional, overall deadline in seconds for \'urls\'>", "max_chars": "<integer: optional, maximum characters of text returned per page>"}'
+
+
+def scrape(url, timeout=15, max_chars=None, max_bytes=None):
+    """
+    Fetches a URL and returns its readable text, at most max_chars characters.
+    Only the first max_bytes of the body are downloaded. Raises on network or HTTP errors.
+    """
+    max_chars = max_chars or settings.get("WEB_SCRAPE_MAX_CHARS", 20000)
+    max_bytes = max_bytes or settings.get("WEB_SCRAPE_MAX_BYTES", 2 * 1024 * 1024)
+    # Pooled keep-alive session; repeat fetches are served or revalidated from the HTTP cache
+    content, content_type, _ = fetch(url, timeout=timeout, max_bytes=max_bytes)
+    text = decode_html(content, content_type)
+    if content_type.startswith("text/plain") or "json" in content_type:
+        return _finish([text], max_chars)
+    return html_to_text(text, max_chars=max_chars)
+
+
+def scrape_many(urls, max_workers=None, timeout=None, max_chars=None):
+    """
+    Scrapes several URLs on a bounded thread pool. Returns {url: {"text": ...}}
+    or {url: {"error": ...}} in the order given; one failing URL does not affect
+    the others. URLs still running when the overall `timeout` expires are
+    reported as timed out. Per-host connection limits and request spacing are
+    applied by the shared HTTP session.
+    """
+    urls = list(dict.fromkeys(urls)) # Drop duplicates, keep order
+    max_workers = max_workers or settings.get("WEB_SCRAPE_WORKERS", 8)
+    timeout = timeout or settings.get("WEB_SCRAPE_TIMEOUT", 60)
+    results = {}
+    if not urls:
+        return results
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)), thread_name_prefix="web_scrape")
+    try:
+        futures = {url: pool.submit(scrape, url, min(15, timeout), max_chars) for url in urls}
+        wait(futures.values(), timeout=timeout)
+        for url, future in futures.items():
+            if not future.done():
+                future.cancel()
+                results[url] = {"error": f"Timed out after {timeout}s"}
+            elif future.exception() is not None:
+                results[url] = {"error": f"Error retrieving or parsing URL: {future.exception()}"}
+            else:
+                results[url] = {"text": future.result()}
+    finally:
+        # Don't hold the agent up on requests that missed the deadline; they finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
 
-DESCRIPTION = "Fetches the text content of a given URL, stripping all HTML tags."
-ARGS_SCHEMA = '{"url": "<string: The full URL to scrape>"}'
 
 def run(action_input):
     if not settings.get("ALLOW_NETWORK", True):
         return "Error: Network access is disabled by permissions."
-        
+
     try:
         args = parse_input(action_input)
         url = args.get("url", "")
+        urls = args.get("urls")
+        if urls:
+            if isinstance(urls, str):
+                urls = [urls]
+            results = scrape_many(urls, timeout=args.get("timeout"), max_chars=args.get("max_chars"))
+            return json.dumps(results, indent=2, ensure_ascii=False)
         if not url:
             return "Error: 'url' argument is required."
 
-        headers = {"User-Agent": "JaraxxusAgent/1.0 (AI Assistant)"}
-        resp = requests.get(url, headers=headers, timeout=15)
-        resp.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-
-        soup = BeautifulSoup(resp.content, "html.parser")
-        
-        # Remove script and style elements
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.decompose()
+        return scrape(url, max_chars=args.get("max_chars"))
 
-        text = soup.get_text(separator="\n", strip=True)
-        return text
-        
     except Exception as e:
         return f"Error retrieving or parsing URL: {e}"
+
+
+def _start_stub_server(body=b"<html><body><p>Stub page</p></body></html>"):
+    """
+    Starts a local keep-alive HTTP server in a daemon thread. /fresh is cacheable
+    for a minute, /revalidate must be revalidated every time (ETag + no-cache),
+    /slow/<n> answers after 200 ms and /missing returns 404.
+    Returns (server, base_url); server.connections counts accepted TCP connections.
+    """
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True # Headers and body go out in separate writes on a kept-alive socket
+
+        def setup(self):
+            super().setup()
+            with self.server.lock:
+                self.server.connections += 1
+
+        def do_GET(self):
+            etag = '"stub-v1"'
+            if self.path == "/missing":
+                self.send_error(404)
+                return
+            if self.path.startswith("/slow/"):
+                time.sleep(0.2)
+            if self.path == "/revalidate" and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "max-age=60" if self.path == "/fresh" else "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.connections = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def benchmark_fetch(repeats=50):
+    """
+    Fetches the same pages repeatedly from a local stub server and reports TCP
+    connections opened and mean latency for: a fresh requests.get per call (the
+    old behaviour), the pooled session, and the pooled session with the cache.
+    """
+    import shutil
+    import statistics
+    import tempfile
+    import time
+    import requests
+    from . import _http
+
+    server, base_url = _start_stub_server()
+    tmp_cache = tempfile.mkdtemp()
+    old_settings = {k: settings.get(k) for k in ("CACHE_DIR", "HTTP_CACHE")}
+    old_interval = _http.host_limiter.min_interval
+    try:
+        settings["CACHE_DIR"] = tmp_cache
+        _http.host_limiter.min_interval = 0 # Measure the transport, not the politeness delay
+        cases = [
+            ("requests.get per call", False, lambda url: requests.get(url, timeout=15).content),
+            ("pooled session", False, lambda url: fetch(url)[0]),
+            ("pooled + cache (fresh)", True, lambda url: fetch(url)[0]),
+        ]
+        for label, use_cache, get in cases:
+            settings["HTTP_CACHE"] = use_cache
+            for path in (("/fresh", "/revalidate") if use_cache else ("/fresh",)):
+                url = base_url + path
+                case_label = label if path == "/fresh" else "pooled + cache (304)"
+                get(url) # Warm up: first fetch opens the connection / fills the cache
+                server.connections = 0
+                timings = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                print(f"{case_label:>24}: {server.connections:>3} connections for {repeats} fetches, "
+                      f"mean {statistics.mean(timings):.2f} ms, median {statistics.median(timings):.2f} ms")
+        cache = _http.get_http_cache()
+        print(f"HTTP cache: {cache.hits} hits, {cache.revalidated} revalidated, {cache.misses} misses")
+    finally:
+        server.shutdown()
+        settings.update(old_settings)
+        _http.host_limiter.min_interval = old_interval
+        _http._http_cache = None
+        shutil.rmtree(tmp_cache, ignore_errors=True)
+
+
+def benchmark_batch(num_urls=10):
+    """Scrapes num_urls slow pages (plus one 404) one by one and then with scrape_many."""
+    import time
+    from . import _http
+
+    server, base_url = _start_stub_server()
+    urls = [f"{base_url}/slow/{i}" for i in range(num_urls)] + [f"{base_url}/missing"]
+    old_cache = settings.get("HTTP_CACHE")
+    try:
+        settings["HTTP_CACHE"] = False
+        start = time.perf_counter()
+        for url in urls:
+            try:
+                scrape(url)
+            except Exception:
+                pass
+        print(f"{'sequential':>12}: {time.perf_counter() - start:.2f}s for {len(urls)} URLs")
+
+        start = time.perf_counter()
+        results = scrape_many(urls)
+        errors = [url for url, result in results.items() if "error" in result]
+        print(f"{'scrape_many':>12}: {time.perf_counter() - start:.2f}s for {len(urls)} URLs, "
+              f"{len(errors)} isolated error(s), {server.connections} connections "
+              f"(per-host cap {settings.get('HTTP_MAX_CONN_PER_HOST', 4)}, "
+              f"spacing {_http.host_limiter.min_interval}s)")
+    finally:
+        server.shutdown()
+        settings["HTTP_CACHE"] = old_cache
+
+
+def _bs4_text(content):
+    """The previous extraction path (BeautifulSoup + html.parser, whole page), kept for comparison."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, "html.parser")
+    for script_or_style in soup(["script", "style"]):
+        script_or_style.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def _make_fixture(paragraphs):
+    """A synthetic page: navigation, inline scripts and a footer around an article of `paragraphs` paragraphs."""
+    nav = "<nav><ul>" + "".join(f"<li><a href='/s{i}'>Section {i}</a></li>" for i in range(200)) + "</ul></nav>"
+    script = "<script>" + "var data = {};" * 2000 + "</script>"
+    article = "".join(f"<p>Paragraph {i} of the article with <b>bold</b> and <a href='#'>linked</a> words. "
+                      f"{'Lorem ipsum dolor sit amet. ' * 8}</p>" for i in range(paragraphs))
+    footer = "<footer>" + "<p>Copyright, contact and legal links.</p>" * 50 + "</footer>"
+    return (f"<html><head><title>Fixture</title><style>{'p {margin: 0} ' * 500}</style>{script}</head>"
+            f"<body><header><h1>Site name</h1></header>{nav}<main><article><h1>Article title</h1>{article}"
+            f"</article></main>{script}{footer}</body></html>").encode("utf-8")
+
+
+def benchmark_extract(fixture_paths=(), repeats=5):
+    """
+    Times the old BeautifulSoup extraction against html_to_text (lxml and the
+    stdlib fallback) on saved .html files, or on generated pages if none are given.
+    """
+    import os
+    import time
+    from . import _html_text
+
+    if fixture_paths:
+        fixtures = [(os.path.basename(p), open(p, "rb").read()) for p in fixture_paths]
+    else:
+        fixtures = [("small page", _make_fixture(20)), ("large page", _make_fixture(8000))]
+    max_chars = settings.get("WEB_SCRAPE_MAX_CHARS", 20000)
+
+    for name, content in fixtures:
+        cases = [("bs4 html.parser", lambda: _bs4_text(content))]
+        if _html_text.lxml is not None:
+            cases.append(("html_to_text lxml", lambda: html_to_text(decode_html(content), max_chars)))
+        cases.append(("html_to_text stdlib",
+                      lambda: _html_text._extract_stdlib(decode_html(content), max_chars)))
+        print(f"{name}: {len(content) / 1024:.0f} KB")
+        for label, extract in cases:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                text = extract()
+            elapsed = (time.perf_counter() - start) / repeats * 1000
+            print(f"  {label:>20}: {elapsed:8.1f} ms, {len(text):>9,} chars returned")
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        benchmark_batch()
+    elif len(sys.argv) > 1 and sys.argv[1] == "extract":
+        benchmark_extract(sys.argv[2:])
+    else:
+        benchmark_fetch()